@@ -10,7 +10,6 @@ from enum import Enum
 from functools import cache
 from itertools import chain, groupby
 from math import factorial
-from typing import NamedTuple
 
 
 ########################################################################################################################
@@ -27,10 +26,31 @@ class ConditionRecord(Enum):
     UNKNOWN = '?'
 
 
-class Spring(NamedTuple):
+class Spring:
+    # A hand-rolled frozen, slotted class; `dataclass(slots=True)` needs Python 3.10.
+    __slots__ = ('condition_records', 'damaged_contiguous_run_lengths')
+
     condition_records: tuple[ConditionRecord, ...]
     damaged_contiguous_run_lengths: tuple[int, ...]
 
+    def __init__(self, condition_records: tuple[ConditionRecord, ...], damaged_contiguous_run_lengths: tuple[int, ...]) -> None:
+        object.__setattr__(self, 'condition_records', condition_records)
+        object.__setattr__(self, 'damaged_contiguous_run_lengths', damaged_contiguous_run_lengths)
+
+    def __setattr__(self, name: str, value: object) -> None:
+        raise AttributeError(f'Cannot assign to field {name!r}')
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Spring):
+            return NotImplemented
+        return (self.condition_records, self.damaged_contiguous_run_lengths) == (other.condition_records, other.damaged_contiguous_run_lengths)
+
+    def __hash__(self) -> int:
+        return hash((self.condition_records, self.damaged_contiguous_run_lengths))
+
+    def __repr__(self) -> str:
+        return f'Spring(condition_records={self.condition_records!r}, damaged_contiguous_run_lengths={self.damaged_contiguous_run_lengths!r})'
+
     @classmethod
     def from_line(cls, line: str) -> 'Spring':
         (raw_condition_records, raw_damaged_contiguous_run_lengths) = line.split(REPORT_FORMAT_DELIMITER)
@@ -5,69 +5,146 @@
 # Imports
 ########################################################################################################################
 
-from collections.abc import Iterator
-from itertools import chain, combinations
-from typing import NamedTuple
+from collections.abc import Iterator, Sequence
+from itertools import chain
 
 
 ########################################################################################################################
 # Notes
 ########################################################################################################################
 
-def single_bit_diff_position(a: int, b: int) -> int:
-    x = a ^ b
-    if x == 0:
-        # Inputs are identical.
-        return -1
-    if x & (x - 1) != 0:
-        # XORed inputs is not a power of two; multiple bits are set.
-        return -1
-    i = -1
-    while x:
-        x >>= 1
-        i += 1
-    return i
+def single_bit_diff_pairs(values: tuple[int, ...]) -> Iterator[tuple[int, int]]:
+    """
+    Yield the index of the first value and the differing bit position, for every pair of values that differ by exactly
+    one bit.
+
+    Only pairs an odd distance apart are considered, since only those can mirror each other across a line of reflection.
+
+    >>> list(single_bit_diff_pairs((0b101, 0b100, 0b110, 0b101)))
+    [(0, 0), (1, 1)]
+    """
+    for (i_0, value_0) in enumerate(values):
+        for value_1 in values[i_0 + 1::2]:
+            x = value_0 ^ value_1
+            # Skip identical values, and values whose XOR is not a power of two (i.e., multiple bits are set).
+            if x and not (x & (x - 1)):
+                yield (i_0, x.bit_length() - 1)
 
 
 ASH = '.'
 ROCKS = '#'
+TILES = frozenset({ASH, ROCKS})
+BITS_BY_CHAR = str.maketrans({ASH: '0', ROCKS: '1'})
 
 COLUMN_REFLECTION_SUMMARY_FACTOR = 1
 ROW_REFLECTION_SUMMARY_FACTOR = 100
 
 
-class Pattern(NamedTuple):
+def reflection_summary(columns: Sequence[int], rows: Sequence[int], ignore_summary: int = 0) -> int:
+    """
+    Summarise the longest reflection across the given columns and rows, ignoring any whose summary is `ignore_summary`.
+
+    >>> reflection_summary((0b01, 0b10, 0b10, 0b01, 0b11), (0b01101, 0b10011))
+    2
+    >>> reflection_summary((0b01, 0b10, 0b10, 0b01, 0b11), (0b01101, 0b10011), ignore_summary=2)
+    0
+    """
+    (width, height) = (len(columns), len(rows))
+    max_reflection_length = max(width, height) // 2
+    best_reflection_length = 0
+    best_summary = 0
+    for x in range(0, width - 1):
+        if columns[x] != columns[x + 1]:
+            continue
+        reflection_length = min(x + 1, width - x - 1)
+        if reflection_length <= best_reflection_length:
+            continue
+        if columns[x + 1 - reflection_length:x + 1][::-1] != columns[x + 1:x + 1 + reflection_length]:
+            continue
+        summary = COLUMN_REFLECTION_SUMMARY_FACTOR * (x + 1)
+        if summary != ignore_summary:
+            best_reflection_length = reflection_length
+            best_summary = summary
+            if best_reflection_length >= max_reflection_length:
+                # Nothing that follows can be any longer, so there's no need to check any more reflections.
+                return best_summary
+    for y in range(0, height - 1):
+        if rows[y] != rows[y + 1]:
+            continue
+        reflection_length = min(y + 1, height - y - 1)
+        if reflection_length <= best_reflection_length:
+            continue
+        if rows[y + 1 - reflection_length:y + 1][::-1] != rows[y + 1:y + 1 + reflection_length]:
+            continue
+        summary = ROW_REFLECTION_SUMMARY_FACTOR * (y + 1)
+        if summary != ignore_summary:
+            best_reflection_length = reflection_length
+            best_summary = summary
+            if best_reflection_length >= max_reflection_length:
+                return best_summary
+    return best_summary
+
+
+class Pattern:
+    # A hand-rolled frozen, slotted class; `dataclass(slots=True)` needs Python 3.10.
+    __slots__ = ('width', 'height', 'columns', 'rows')
+
     width: int
     height: int
-    columns: tuple[int, ...] = ()
-    rows: tuple[int, ...] = ()
+    columns: tuple[int, ...]
+    rows: tuple[int, ...]
+
+    def __init__(self, width: int, height: int, columns: tuple[int, ...] = (), rows: tuple[int, ...] = ()) -> None:
+        object.__setattr__(self, 'width', width)
+        object.__setattr__(self, 'height', height)
+        object.__setattr__(self, 'columns', columns)
+        object.__setattr__(self, 'rows', rows)
+
+    def __setattr__(self, name: str, value: object) -> None:
+        raise AttributeError(f'Cannot assign to field {name!r}')
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Pattern):
+            return NotImplemented
+        return (self.width, self.height, self.columns, self.rows) == (other.width, other.height, other.columns, other.rows)
+
+    def __hash__(self) -> int:
+        return hash((self.width, self.height, self.columns, self.rows))
+
+    def __repr__(self) -> str:
+        return f'Pattern(width={self.width!r}, height={self.height!r}, columns={self.columns!r}, rows={self.rows!r})'
 
     @classmethod
     def from_lines(cls, lines: Iterator[str]) -> 'Pattern':
+        """
+        >>> Pattern.from_lines(iter(['#1.']))
+        Traceback (most recent call last):
+            ...
+        ValueError: Unexpected tile on line 1: '#1.'
+        >>> Pattern.from_lines(iter([' #_.']))
+        Traceback (most recent call last):
+            ...
+        ValueError: Unexpected tile on line 1: ' #_.'
+        """
         width = -1
-        height = 0
-        columns: list[int] = []
-        rows: list[int] = []
+        grid: list[str] = []
         for (y, line) in enumerate(lines):
             # Ensure width is consistent across lines.
             if y == 0:
                 width = len(line)
-                assert not columns
-                columns = [0] * width
             elif len(line) == 0:
                 break
             elif len(line) != width:
                 raise ValueError(f'Width of line {y + 1} differs from line 1 ({len(line)} ≠ {width})')
-
-            height += 1
-            row = 0
-            for (x, char) in enumerate(line):
-                assert char in {ASH, ROCKS}
-                bit = char == ROCKS
-                columns[x] = (columns[x] << 1) | bit
-                row = (row << 1) | bit
-            rows.append(row)
-        return Pattern(width, height, tuple(columns), tuple(rows))
+            # Translating passes through any other characters, which `int()` would then misread (or skip), so we have to
+            # reject them up front.
+            if not TILES.issuperset(line):
+                raise ValueError(f'Unexpected tile on line {y + 1}: {line!r}')
+            grid.append(line)
+        # Pack each row and column into an integer in one go, rather than shifting in one bit per character.
+        rows = tuple(int(line.translate(BITS_BY_CHAR), 2) for line in grid)
+        columns = tuple(int(''.join(column).translate(BITS_BY_CHAR), 2) for column in zip(*grid))
+        return Pattern(width, len(grid), columns, rows)
 
     def summarise(self, ignore_summary: int = 0) -> int:
         """
@@ -113,42 +190,7 @@ class Pattern(NamedTuple):
         ... ])).summarise()
         1600
         """
-        best_reflection_length = 0
-        best_summary = 0
-        for x in range(0, self.width - 1):
-            if self.columns[x] != self.columns[x + 1]:
-                continue
-            reflection_length = min(x + 1, self.width - x - 1)
-            if reflection_length <= best_reflection_length:
-                continue
-            if tuple(reversed(self.columns[x + 1 - reflection_length:x + 1])) != self.columns[x + 1:x + 1 + reflection_length]:
-                continue
-            summary = COLUMN_REFLECTION_SUMMARY_FACTOR * (x + 1)
-            if summary != ignore_summary:
-                best_reflection_length = reflection_length
-                best_summary = summary
-        for y in range(0, self.height - 1):
-            if self.rows[y] != self.rows[y + 1]:
-                continue
-            reflection_length = min(y + 1, self.height - y - 1)
-            if reflection_length <= best_reflection_length:
-                continue
-            if tuple(reversed(self.rows[y + 1 - reflection_length:y + 1])) != self.rows[y + 1:y + 1 + reflection_length]:
-                continue
-            summary = ROW_REFLECTION_SUMMARY_FACTOR * (y + 1)
-            if summary != ignore_summary:
-                best_reflection_length = reflection_length
-                best_summary = summary
-        return best_summary
-
-    def flip_bit(self, x: int, y: int) -> 'Pattern':
-        assert 0 <= x <= self.width
-        assert 0 <= y <= self.height
-        modified_column = self.columns[x] ^ (1 << y)
-        modified_columns = self.columns[:x] + (modified_column,) + self.columns[x + 1:]
-        modified_row = self.rows[y] ^ (1 << x)
-        modified_rows = self.rows[:y] + (modified_row,) + self.rows[y + 1:]
-        return Pattern(self.width, self.height, modified_columns, modified_rows)
+        return reflection_summary(self.columns, self.rows, ignore_summary)
 
     def summarise_repaired(self) -> int:
         """
@@ -174,20 +216,23 @@ class Pattern(NamedTuple):
         100
         """
         smudged_summary = self.summarise()
-        for ((i_0, column_0), (i_1, column_1)) in combinations(enumerate(self.columns), 2):
-            bit_diff_position = single_bit_diff_position(column_0, column_1)
-            if bit_diff_position < 0:
-                continue
-            modified_pattern = self.flip_bit(i_0, bit_diff_position)
-            new_summary = modified_pattern.summarise(ignore_summary=smudged_summary)
-            if new_summary > 0:
-                return new_summary
-        for ((i_0, row_0), (i_1, row_1)) in combinations(enumerate(self.rows), 2):
-            bit_diff_position = single_bit_diff_position(row_0, row_1)
-            if bit_diff_position < 0:
-                continue
-            modified_pattern = self.flip_bit(bit_diff_position, i_0)
-            new_summary = modified_pattern.summarise(ignore_summary=smudged_summary)
+        # Each column packs its cells from the top down, and each row from the left, into bits from the most significant
+        # down; so cell (x, y) is bit `height - 1 - y` of column x, and bit `width - 1 - x` of row y.
+        (width, height) = (self.width, self.height)
+        candidate_smudges = chain(
+            ((x, height - 1 - bit) for (x, bit) in single_bit_diff_pairs(self.columns)),
+            ((width - 1 - bit, y) for (y, bit) in single_bit_diff_pairs(self.rows)),
+        )
+        # Rather than building a whole new pattern for each candidate repair, we flip (and later restore) the cell's bits in
+        # place.
+        columns = list(self.columns)
+        rows = list(self.rows)
+        for (x, y) in candidate_smudges:
+            columns[x] ^= 1 << (height - 1 - y)
+            rows[y] ^= 1 << (width - 1 - x)
+            new_summary = reflection_summary(columns, rows, ignore_summary=smudged_summary)
+            columns[x] ^= 1 << (height - 1 - y)
+            rows[y] ^= 1 << (width - 1 - x)
             if new_summary > 0:
                 return new_summary
         return 0
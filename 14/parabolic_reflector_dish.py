@@ -5,10 +5,11 @@
 # Imports
 ########################################################################################################################
 
-from collections.abc import Iterable, Iterator
+from collections.abc import Iterable
 from enum import Enum
-from itertools import tee
-from typing import NamedTuple
+from functools import cache
+import operator
+from typing import Callable, NamedTuple
 
 
 ########################################################################################################################
@@ -21,59 +22,133 @@ class CardinalDirection(Enum):
     SOUTH = 'S'
     WEST = 'W'
 
-    @property
-    def reverse(self):
-        if self == CardinalDirection.NORTH:
-            return CardinalDirection.SOUTH
-        elif self == CardinalDirection.SOUTH:
-            return CardinalDirection.NORTH
-        elif self == CardinalDirection.EAST:
-            return CardinalDirection.WEST
-        elif self == CardinalDirection.WEST:
-            return CardinalDirection.EAST
-        else:
-            raise ValueError(f'Unexpected direction: {self!r}')
-
-
-def coordinates(width: int, height: int, main_axis_direction: CardinalDirection) -> Iterator[Iterator[tuple[int, int]]]:
-    if main_axis_direction == CardinalDirection.NORTH:
-        return (((x, y) for y in range(height - 1, -1, -1)) for x in range(width))
-    elif main_axis_direction == CardinalDirection.SOUTH:
-        return (((x, y) for y in range(height)) for x in range(width))
-    elif main_axis_direction == CardinalDirection.EAST:
-        return (((x, y) for x in range(width)) for y in range(height))
-    elif main_axis_direction == CardinalDirection.WEST:
-        return (((x, y) for x in range(width - 1, -1, -1)) for y in range(height))
+
+@cache
+def row_mask(width: int) -> int:
+    """
+    Mask the bottom row of a bitboard.
+
+    >>> bin(row_mask(3))
+    '0b111'
+    """
+    return (1 << width) - 1
+
+
+@cache
+def column_mask(width: int, height: int) -> int:
+    """
+    Mask the rightmost column of a bitboard.
+
+    >>> bin(column_mask(3, 4))
+    '0b1001001001'
+    """
+    # This is the geometric series 1 + 2**width + 2**(2 * width) + … + 2**((height - 1) * width).
+    return ((1 << (width * height)) - 1) // row_mask(width)
+
+
+@cache
+def roll_table(width: int, height: int, cube_shaped_rocks: int, direction: CardinalDirection) -> tuple[Callable[[int, int], int], Callable[[int, int], int], int, int]:
+    """
+    Describe how rounded rocks roll one tile in the given direction: how to shift a bitboard towards (and away from) that
+    direction, by how many bits, and which tiles they can roll from at all.
+
+    Cube-shaped rocks never move, so we only need to work out which tiles sit on the platform's edge or up against a
+    cube-shaped rock once per platform.
+    """
+    if direction == CardinalDirection.NORTH:
+        (shift_forwards, shift_backwards, shift) = (operator.lshift, operator.rshift, width)
+        edge = row_mask(width) << (width * (height - 1))
+    elif direction == CardinalDirection.SOUTH:
+        (shift_forwards, shift_backwards, shift) = (operator.rshift, operator.lshift, width)
+        edge = row_mask(width)
+    elif direction == CardinalDirection.WEST:
+        (shift_forwards, shift_backwards, shift) = (operator.lshift, operator.rshift, 1)
+        edge = column_mask(width, height) << (width - 1)
+    elif direction == CardinalDirection.EAST:
+        (shift_forwards, shift_backwards, shift) = (operator.rshift, operator.lshift, 1)
+        edge = column_mask(width, height)
     else:
-        raise ValueError(f'Unexpected direction: {main_axis_direction!r}')
+        raise ValueError(f'Unexpected direction: {direction!r}')
+    blocked = shift_backwards(cube_shaped_rocks, shift)
+    rollable_tiles = ((1 << (width * height)) - 1) & ~(edge | blocked)
+    return (shift_forwards, shift_backwards, shift, rollable_tiles)
+
 
+EMPTY_SPACE = '.'
+CUBE_SHAPED_ROCK = '#'
+ROUNDED_ROCK = 'O'
+TILES = frozenset({EMPTY_SPACE, CUBE_SHAPED_ROCK, ROUNDED_ROCK})
+ROUNDED_ROCK_BITS_BY_CHAR = str.maketrans({EMPTY_SPACE: '0', CUBE_SHAPED_ROCK: '0', ROUNDED_ROCK: '1'})
+CUBE_SHAPED_ROCK_BITS_BY_CHAR = str.maketrans({EMPTY_SPACE: '0', CUBE_SHAPED_ROCK: '1', ROUNDED_ROCK: '0'})
 
-class Tile(Enum):
-    EMPTY_SPACE = '.'
-    CUBE_SHAPED_ROCK = '#'
-    ROUNDED_ROCK = 'O'
+SPIN_CYCLE_DIRECTIONS = (CardinalDirection.NORTH, CardinalDirection.WEST, CardinalDirection.SOUTH, CardinalDirection.EAST)
 
 
 class Platform(NamedTuple):
+    """
+    Represent a platform as a pair of bitboards, one for each type of rock.
+
+    Each bitboard packs the rows from top to bottom, and each row from left to right, from the most significant bit down;
+    in other words, a bitboard is just the platform's lines concatenated and read as a binary number.
+    """
     width: int
     height: int
-    rows: tuple[tuple[Tile, ...], ...] = ()
+    rounded_rocks: int = 0
+    cube_shaped_rocks: int = 0
 
     @classmethod
     def from_lines(cls, lines: Iterable[str]) -> 'Platform':
+        """
+        >>> Platform.from_lines(['O1.'])
+        Traceback (most recent call last):
+            ...
+        ValueError: Unexpected tile on line 1: 'O1.'
+        >>> Platform.from_lines(['O_.'])
+        Traceback (most recent call last):
+            ...
+        ValueError: Unexpected tile on line 1: 'O_.'
+        """
         width = -1
-        rows: list[tuple[Tile, ...]] = []
+        rows: list[str] = []
         for (y, line) in enumerate(lines):
             # Ensure width is consistent across lines.
             if y == 0:
                 width = len(line)
             elif len(line) != width:
                 raise ValueError(f'Width of line {y + 1} differs from line 1 ({len(line)} ≠ {width})')
-            rows.append(tuple(Tile(char) for char in line))
-        return Platform(width, y + 1, tuple(rows))
+            # Translating passes through any other characters, which `int()` would then misread (or skip), so we have to
+            # reject them up front.
+            if not TILES.issuperset(line):
+                raise ValueError(f'Unexpected tile on line {y + 1}: {line!r}')
+            rows.append(line)
+        tiles = ''.join(rows)
+        rounded_rocks = int(tiles.translate(ROUNDED_ROCK_BITS_BY_CHAR), 2)
+        cube_shaped_rocks = int(tiles.translate(CUBE_SHAPED_ROCK_BITS_BY_CHAR), 2)
+        return Platform(width, len(rows), rounded_rocks, cube_shaped_rocks)
 
     def __str__(self) -> str:
-        return '\n'.join(''.join(tile.value for tile in row) for row in self.rows)
+        num_tiles = self.width * self.height
+        tiles = (
+            ROUNDED_ROCK if (self.rounded_rocks >> i) & 1 else CUBE_SHAPED_ROCK if (self.cube_shaped_rocks >> i) & 1 else EMPTY_SPACE
+            for i in range(num_tiles - 1, -1, -1)
+        )
+        raw_tiles = ''.join(tiles)
+        return '\n'.join(raw_tiles[i:i + self.width] for i in range(0, num_tiles, self.width))
+
+    def roll_rounded_rocks(self, rounded_rocks: int, direction: CardinalDirection) -> int:
+        """
+        Roll the given bitboard of rounded rocks as far as they'll go in the given direction.
+        """
+        (shift_forwards, shift_backwards, shift, rollable_tiles) = roll_table(self.width, self.height, self.cube_shaped_rocks, direction)
+        # Every rounded rock that can roll one tile in the given direction does so at once; we repeat until none can. The
+        # direction is entirely captured by the roll table, so there's just the one loop for all four.
+        while True:
+            moving_rocks = rounded_rocks & rollable_tiles & ~shift_backwards(rounded_rocks, shift)
+            if not moving_rocks:
+                break
+            rounded_rocks ^= moving_rocks | shift_forwards(moving_rocks, shift)
+
+        return rounded_rocks
 
     def tilt(self, direction: CardinalDirection) -> 'Platform':
         r"""
@@ -91,31 +166,9 @@ class Platform(NamedTuple):
         ... ]).tilt(CardinalDirection.NORTH))
         'OOOO.#.O..\nOO..#....#\nOO..O##..O\nO..#.OO...\n........#.\n..#....#.#\n..O..#.O.O\n..O.......\n#....###..\n#....#....'
         """
-        mutable_rows = list(list(row) for row in self.rows)
-
-        for cross_axis in coordinates(self.width, self.height, direction.reverse):
-            (read_pass, write_pass) = tee(cross_axis)
-            tilted_main_axis: list[Tile] = []
-            for (x, y) in read_pass:
-                tile = self.rows[y][x]
-                if tile == Tile.ROUNDED_ROCK:
-                    try:
-                        # We're inserting at the start of the list because there's no `rindex`.
-                        insertion_point = tilted_main_axis.index(Tile.CUBE_SHAPED_ROCK)
-                    except ValueError:
-                        insertion_point = len(tilted_main_axis)
-                elif tile in {Tile.EMPTY_SPACE, Tile.CUBE_SHAPED_ROCK}:
-                    insertion_point = 0
-                else:
-                    raise ValueError(f'Unexpected tile: {tile!r}')
-                tilted_main_axis.insert(insertion_point, tile)
-            tilted_main_axis.reverse()
-            for ((x, y), tile) in zip(write_pass, tilted_main_axis):
-                mutable_rows[y][x] = tile
-
-        updated_rows = tuple(tuple(row) for row in mutable_rows)
-        if updated_rows != self.rows:
-            return Platform(self.width, self.height, updated_rows)
+        rounded_rocks = self.roll_rounded_rocks(self.rounded_rocks, direction)
+        if rounded_rocks != self.rounded_rocks:
+            return Platform(self.width, self.height, rounded_rocks, self.cube_shaped_rocks)
         return self
 
     def run_spin_cycle(self) -> 'Platform':
@@ -142,10 +195,13 @@ class Platform(NamedTuple):
         >>> str(platform_after_three_cycles)
         '.....#....\n....#...O#\n.....##...\n..O#......\n.....OOO#.\n.O#...O#.#\n....O#...O\n.......OOO\n#...O###.O\n#.OOO#...O'
         """
-        return self.tilt(CardinalDirection.NORTH) \
-                   .tilt(CardinalDirection.WEST)  \
-                   .tilt(CardinalDirection.SOUTH) \
-                   .tilt(CardinalDirection.EAST)
+        # Only build a new platform once, at the end of the cycle, rather than after each tilt.
+        rounded_rocks = self.rounded_rocks
+        for direction in SPIN_CYCLE_DIRECTIONS:
+            rounded_rocks = self.roll_rounded_rocks(rounded_rocks, direction)
+        if rounded_rocks != self.rounded_rocks:
+            return Platform(self.width, self.height, rounded_rocks, self.cube_shaped_rocks)
+        return self
 
     def calculate_support_beam_load(self, direction: CardinalDirection) -> int:
         """
@@ -163,17 +219,18 @@ class Platform(NamedTuple):
         ... ]).calculate_support_beam_load(CardinalDirection.NORTH)
         136
         """
+        # Sum the weight of each row (or column) of rounded rocks, counting from the bottom row (or rightmost column).
         if direction == CardinalDirection.NORTH:
-            tile_weights = ((tile, i + 1) for (i, row) in enumerate(reversed(self.rows)) for tile in row)
+            (num_lines, shift, mask, weights) = (self.height, self.width, row_mask(self.width), range(1, self.height + 1))
         elif direction == CardinalDirection.SOUTH:
-            tile_weights = ((tile, i + 1) for (i, row) in enumerate(self.rows) for tile in row)
+            (num_lines, shift, mask, weights) = (self.height, self.width, row_mask(self.width), range(self.height, 0, -1))
         elif direction == CardinalDirection.EAST:
-            tile_weights = ((tile, i + 1) for row in self.rows for (i, tile) in enumerate(row))
+            (num_lines, shift, mask, weights) = (self.width, 1, column_mask(self.width, self.height), range(self.width, 0, -1))
         elif direction == CardinalDirection.WEST:
-            tile_weights = ((tile, i + 1) for row in self.rows for (i, tile) in enumerate(reversed(row)))
+            (num_lines, shift, mask, weights) = (self.width, 1, column_mask(self.width, self.height), range(1, self.width + 1))
         else:
             raise ValueError(f'Unexpected direction: {direction!r}')
-        return sum(weight for (tile, weight) in tile_weights if (tile == Tile.ROUNDED_ROCK))
+        return sum(weight * bin((self.rounded_rocks >> (i * shift)) & mask).count('1') for (i, weight) in zip(range(num_lines), weights))
 
 
 ########################################################################################################################
@@ -225,15 +282,16 @@ def run_billion_spin_cycles_and_calculate_support_beam_load(lines: Iterable[str]
     64
     """
     platform = Platform.from_lines(lines)
-    witnessed_platforms = {platform: 0}
+    # Cube-shaped rocks never move, so the rounded rocks alone identify a platform's state.
+    witnessed_platforms = {platform.rounded_rocks: 0}
     witnessed_platforms_sequence = [platform]
     for i in range(1, ONE_BILLION + 1):
         platform = platform.run_spin_cycle()
-        if platform in witnessed_platforms:
+        if platform.rounded_rocks in witnessed_platforms:
             break
-        witnessed_platforms[platform] = i
+        witnessed_platforms[platform.rounded_rocks] = i
         witnessed_platforms_sequence.append(platform)
-    cycle_start = witnessed_platforms[platform]
+    cycle_start = witnessed_platforms[platform.rounded_rocks]
     cycle_length = i - cycle_start
     if cycle_length > 0:
         cycle_pos = cycle_start + ((ONE_BILLION - i) % cycle_length)
@@ -5,16 +5,17 @@
 # Imports
 ########################################################################################################################
 
-from collections.abc import Iterable, Iterator
-from enum import Enum
-import re
-from typing import NamedTuple, Optional
+from collections.abc import Iterable
+from typing import Optional
 
 
 ########################################################################################################################
 # Part 1
 ########################################################################################################################
 
+STEP_DELIMITER = b','
+
+
 def calculate_hash(string: bytes) -> int:
     """
     >>> calculate_hash(b'HASH')
@@ -44,73 +45,70 @@ def calculate_hash(string: bytes) -> int:
     """
     value = 0
     for byte in string:
-        value = ((value + byte) * 17) % 256
+        value = ((value + byte) * 17) & 0xFF
     return value
 
 
-def extract_steps(lines: Iterator[bytes]) -> Iterator[bytes]:
-    initialization_sequence = next(lines)
-    for step in initialization_sequence.split(b','):
-        yield step
-
-
 def calculate_verification_number(lines: Iterable[bytes]) -> int:
     """
     >>> calculate_verification_number([b'rn=1,cm-,qp=3,cm=2,qp-,pc=4,ot=9,ab=5,pc-,pc=6,ot=7'])
     1320
     """
-    return sum(calculate_hash(step) for step in extract_steps(iter(lines)))
+    initialization_sequence = next(iter(lines))
+    return sum(map(calculate_hash, initialization_sequence.split(STEP_DELIMITER)))
 
 
 ########################################################################################################################
 # Part 2
 ########################################################################################################################
 
-# What are you doing…
-STEP_PATTERN = re.compile(br'^([a-z]+)([-=])([1-9])?$')
-
-
-class Operation(Enum):
-    REMOVE_LENS = b'-'
-    ADD_OR_REPLACE_LENS = b'='
-
-
-class Step(NamedTuple):
-    label: bytes
-    box_number: int
-    operation: Operation
-    focal_length: Optional[int]
-
-    @classmethod
-    def from_string(cls, string: bytes) -> 'Step':
-        match = STEP_PATTERN.fullmatch(string)
-        if not match:
-            raise ValueError(f'Step {string!r} does not match expected pattern /{STEP_PATTERN.pattern.decode()}/')
-        label = match.group(1)
-        box_number = calculate_hash(label)
-        assert 0 <= box_number <= 255
-        operation = Operation(match.group(2))
-        if operation == Operation.ADD_OR_REPLACE_LENS:
-            focal_length = int(match.group(3))
-            assert 1 <= focal_length <= 9
-        else:
-            focal_length = None
-        return Step(label, box_number, operation, focal_length)
+REMOVE_LENS = b'-'
+ADD_OR_REPLACE_LENS = b'='
 
 
-def run_manual_arrangement_procedure(steps: Iterable[Step]) -> tuple[dict[bytes, int], ...]:
+def run_manual_arrangement_procedure(initialization_sequence: bytes) -> tuple[dict[bytes, int], ...]:
+    """
+    >>> run_manual_arrangement_procedure(b'rn=1,cm-,qp=3,cm=2,qp-,pc=4,ot=9,ab=5,pc-,pc=6,ot=7')[:4]
+    ({b'rn': 1, b'cm': 2}, {}, {}, {b'ot': 7, b'ab': 5, b'pc': 6})
+    >>> run_manual_arrangement_procedure(b'rn=1,cm=0')
+    Traceback (most recent call last):
+        ...
+    ValueError: Step at offset 5 is not of the form <label>- or <label>=<focal length>
+    >>> run_manual_arrangement_procedure(b'rn=1,xyz')
+    Traceback (most recent call last):
+        ...
+    ValueError: Step at offset 5 is not of the form <label>- or <label>=<focal length>
+    >>> run_manual_arrangement_procedure(b'rn-,')
+    Traceback (most recent call last):
+        ...
+    ValueError: Step at offset 4 is not of the form <label>- or <label>=<focal length>
+    >>> run_manual_arrangement_procedure(b'AB=1')
+    Traceback (most recent call last):
+        ...
+    ValueError: Step at offset 0 is not of the form <label>- or <label>=<focal length>
+    """
+    # Rather than parsing every step into its own object before applying any of them, we apply each step to its box as
+    # soon as we've parsed it. Steps are simple enough (a lowercase label, then either `-` or `=` and a digit) to parse
+    # by hand.
     boxes: list[dict[bytes, int]] = [{} for _ in range(256)]
-    for step in steps:
-        box = boxes[step.box_number]
-        if step.operation == Operation.REMOVE_LENS:
-            if step.label in box:
-                del box[step.label]
-        elif step.operation == Operation.ADD_OR_REPLACE_LENS:
-            assert step.focal_length is not None
-            # Since Python 3.7, dictionaries are guaranteed to preserve insertion order.
-            box[step.label] = step.focal_length
+    step_start = 0
+    for step in initialization_sequence.split(STEP_DELIMITER):
+        focal_length: Optional[int]
+        if step[-1:] == REMOVE_LENS:
+            (label, focal_length) = (step[:-1], None)
+        elif (step[-2:-1] == ADD_OR_REPLACE_LENS) and (b'1' <= step[-1:] <= b'9'):
+            (label, focal_length) = (step[:-2], step[-1] - ord(b'0'))
         else:
-            raise ValueError(f'Unknown step operation: {step.operation}')
+            label = b''
+        if not (label.isalpha() and label.islower()):
+            raise ValueError(f'Step at offset {step_start} is not of the form <label>- or <label>=<focal length>')
+        box = boxes[calculate_hash(label)]
+        if focal_length is None:
+            box.pop(label, None)
+        else:
+            # Since Python 3.7, dictionaries are guaranteed to preserve insertion order.
+            box[label] = focal_length
+        step_start += len(step) + len(STEP_DELIMITER)
     return tuple(boxes)
 
 
@@ -119,8 +117,7 @@ def sum_focusing_power(lines: Iterable[bytes]) -> int:
     >>> sum_focusing_power([b'rn=1,cm-,qp=3,cm=2,qp-,pc=4,ot=9,ab=5,pc-,pc=6,ot=7'])
     145
     """
-    steps = (Step.from_string(string) for string in extract_steps(iter(lines)))
-    boxes = run_manual_arrangement_procedure(steps)
+    boxes = run_manual_arrangement_procedure(next(iter(lines)))
     return sum(
         ((box_number + 1) * (slot_number + 1) * focal_length)
         for (box_number, lens_slots) in enumerate(boxes)
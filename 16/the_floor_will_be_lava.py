@@ -6,7 +6,8 @@
 ########################################################################################################################
 
 from collections.abc import Iterable
-from enum import Enum
+from concurrent.futures import ProcessPoolExecutor
+from enum import Enum, IntEnum
 from itertools import chain
 from typing import NamedTuple, Optional
 
@@ -15,30 +16,28 @@ from typing import NamedTuple, Optional
 # Contraption
 ########################################################################################################################
 
-class CardinalDirection(Enum):
-    NORTH = 'N'
-    EAST = 'E'
-    SOUTH = 'S'
-    WEST = 'W'
+class CardinalDirection(IntEnum):
+    # We number directions so that each can be used directly as a bit index into a visited mask.
+    NORTH = 0
+    EAST = 1
+    SOUTH = 2
+    WEST = 3
+
+
+DIRECTIONS = tuple(CardinalDirection)
+
+
+# The (dx, dy) of a single step in each direction, indexed by direction.
+DELTAS = ((0, -1), (1, 0), (0, 1), (-1, 0))
 
 
 def translate(width: int, height: int, x: int, y: int, direction: CardinalDirection) -> Optional[tuple[int, int]]:
     assert 0 <= x < width
     assert 0 <= y < height
-    if direction == CardinalDirection.NORTH:
-        if y > 0:
-            return (x, y - 1)
-    elif direction == CardinalDirection.SOUTH:
-        if y < height - 1:
-            return (x, y + 1)
-    elif direction == CardinalDirection.EAST:
-        if x < width - 1:
-            return (x + 1, y)
-    elif direction == CardinalDirection.WEST:
-        if x > 0:
-            return (x - 1, y)
-    else:
-        raise ValueError(f'Unexpected direction: {direction!r}')
+    (dx, dy) = DELTAS[direction]
+    (x, y) = (x + dx, y + dy)
+    if (0 <= x < width) and (0 <= y < height):
+        return (x, y)
     return None
 
 
@@ -50,77 +49,100 @@ class Tile(Enum):
     EAST_WEST_SPLITTER = '-'
 
 
+# For each tile, the direction(s) in which a beam leaves, indexed by the direction in which it entered.
+TRANSITIONS: dict[Tile, tuple[tuple[CardinalDirection, ...], ...]] = {
+    Tile.EMPTY_SPACE: (
+        (CardinalDirection.NORTH,),
+        (CardinalDirection.EAST,),
+        (CardinalDirection.SOUTH,),
+        (CardinalDirection.WEST,),
+    ),
+    Tile.NE_SW_MIRROR: (
+        (CardinalDirection.EAST,),
+        (CardinalDirection.NORTH,),
+        (CardinalDirection.WEST,),
+        (CardinalDirection.SOUTH,),
+    ),
+    Tile.NW_SE_MIRROR: (
+        (CardinalDirection.WEST,),
+        (CardinalDirection.SOUTH,),
+        (CardinalDirection.EAST,),
+        (CardinalDirection.NORTH,),
+    ),
+    Tile.NORTH_SOUTH_SPLITTER: (
+        (CardinalDirection.NORTH,),
+        (CardinalDirection.NORTH, CardinalDirection.SOUTH),
+        (CardinalDirection.SOUTH,),
+        (CardinalDirection.NORTH, CardinalDirection.SOUTH),
+    ),
+    Tile.EAST_WEST_SPLITTER: (
+        (CardinalDirection.EAST, CardinalDirection.WEST),
+        (CardinalDirection.EAST,),
+        (CardinalDirection.EAST, CardinalDirection.WEST),
+        (CardinalDirection.WEST,),
+    ),
+}
+
+# We store tiles as small ints (their index in Tile), so that we can parse a whole line at once with bytes.translate,
+# and look up transitions by (tile index × 4) + direction in one flat table.
+TILE_CHARS = ''.join(tile.value for tile in Tile).encode('ascii')
+TILE_INDICES_BY_CHAR = bytes.maketrans(TILE_CHARS, bytes(range(len(TILE_CHARS))))
+CHARS_BY_TILE_INDEX = bytes.maketrans(bytes(range(len(TILE_CHARS))), TILE_CHARS)
+TRANSITIONS_BY_TILE_INDEX = tuple(chain.from_iterable(TRANSITIONS[tile] for tile in Tile))
+
+
 class Contraption(NamedTuple):
     width: int
     height: int
-    rows: tuple[tuple[Tile, ...], ...] = ()
+    # Tile indices, in row-major order.
+    tiles: bytes = b''
 
     @classmethod
     def from_lines(cls, lines: Iterable[str]) -> 'Contraption':
         width = -1
-        rows: list[tuple[Tile, ...]] = []
+        rows: list[bytes] = []
         for (y, line) in enumerate(lines):
             # Ensure width is consistent across lines.
             if y == 0:
                 width = len(line)
             elif len(line) != width:
                 raise ValueError(f'Width of line {y + 1} differs from line 1 ({len(line)} ≠ {width})')
-            rows.append(tuple(Tile(char) for char in line))
-        return Contraption(width, y + 1, tuple(rows))
+            row = line.encode('ascii')
+            if row.translate(None, TILE_CHARS):
+                raise ValueError(f'Unexpected tile on line {y + 1}: {line!r}')
+            rows.append(row.translate(TILE_INDICES_BY_CHAR))
+        return Contraption(width, y + 1, b''.join(rows))
 
     def __str__(self) -> str:
-        return '\n'.join(''.join(tile.value for tile in row) for row in self.rows)
-
-    def simulate(self, starting_beamfront: tuple[int, int, CardinalDirection] = (0, 0, CardinalDirection.EAST)) -> tuple[tuple[set[CardinalDirection], ...], ...]:
-        beams: list[list[set[CardinalDirection]]] = [[set() for _ in row] for row in self.rows]
+        chars = self.tiles.translate(CHARS_BY_TILE_INDEX).decode('ascii')
+        return '\n'.join(chars[i:i + self.width] for i in range(0, len(chars), self.width))
+
+    def simulate(self, starting_beamfront: tuple[int, int, CardinalDirection] = (0, 0, CardinalDirection.EAST)) -> bytearray:
+        """
+        Trace the beams through the contraption, returning (in row-major order) a bitmask for each tile of the directions
+        in which beams passed through it.
+        """
+        beams = bytearray(self.width * self.height)
         beamfronts = [starting_beamfront]
         while beamfronts:
             next_beamfronts: list[tuple[int, int, CardinalDirection]] = []
             for (x, y, direction) in beamfronts:
-                if direction in beams[y][x]:
+                i = y * self.width + x
+                direction_bit = 1 << direction
+                if beams[i] & direction_bit:
                     continue
-                beams[y][x].add(direction)
-                tile = self.rows[y][x]
-                if (tile == Tile.EMPTY_SPACE) or \
-                   ((tile == Tile.NORTH_SOUTH_SPLITTER) and (direction in {CardinalDirection.NORTH, CardinalDirection.SOUTH})) or \
-                   ((tile == Tile.EAST_WEST_SPLITTER) and (direction in {CardinalDirection.EAST, CardinalDirection.WEST})):
-                    next_directions = [direction]
-                elif tile == Tile.NE_SW_MIRROR:
-                    if direction == CardinalDirection.NORTH:
-                        next_directions = [CardinalDirection.EAST]
-                    elif direction == CardinalDirection.WEST:
-                        next_directions = [CardinalDirection.SOUTH]
-                    elif direction == CardinalDirection.SOUTH:
-                        next_directions = [CardinalDirection.WEST]
-                    elif direction == CardinalDirection.EAST:
-                        next_directions = [CardinalDirection.NORTH]
-                    else:
-                        raise ValueError(f'Unexpected direction: {direction!r}')
-                elif tile == Tile.NW_SE_MIRROR:
-                    if direction == CardinalDirection.NORTH:
-                        next_directions = [CardinalDirection.WEST]
-                    elif direction == CardinalDirection.EAST:
-                        next_directions = [CardinalDirection.SOUTH]
-                    elif direction == CardinalDirection.SOUTH:
-                        next_directions = [CardinalDirection.EAST]
-                    elif direction == CardinalDirection.WEST:
-                        next_directions = [CardinalDirection.NORTH]
-                    else:
-                        raise ValueError(f'Unexpected direction: {direction!r}')
-                elif tile == Tile.NORTH_SOUTH_SPLITTER:
-                    assert direction in {CardinalDirection.EAST, CardinalDirection.WEST}
-                    next_directions = [CardinalDirection.NORTH, CardinalDirection.SOUTH]
-                elif tile == Tile.EAST_WEST_SPLITTER:
-                    assert direction in {CardinalDirection.NORTH, CardinalDirection.SOUTH}
-                    next_directions = [CardinalDirection.EAST, CardinalDirection.WEST]
-                else:
-                    raise ValueError(f'Unexpected tile at row {y + 1}, column {x + 1}: {tile!r}')
+                beams[i] |= direction_bit
+                next_directions = TRANSITIONS_BY_TILE_INDEX[(self.tiles[i] * len(DIRECTIONS)) + direction]
                 for next_direction in next_directions:
                     next_coordinates = translate(self.width, self.height, x, y, next_direction)
                     if next_coordinates:
                         next_beamfronts.append((*next_coordinates, next_direction))
             beamfronts = next_beamfronts
-        return tuple(tuple(tile for tile in row) for row in beams)
+        return beams
+
+    def count_energised_tiles(self, starting_beamfront: tuple[int, int, CardinalDirection] = (0, 0, CardinalDirection.EAST)) -> int:
+        beams = self.simulate(starting_beamfront)
+        return len(beams) - beams.count(0)
 
 
 ########################################################################################################################
@@ -144,8 +166,7 @@ def count_energised_tiles(lines: Iterable[str]) -> int:
     46
     """
     contraption = Contraption.from_lines(lines)
-    beams = contraption.simulate()
-    return sum(1 for row in beams for tile in row if tile)
+    return contraption.count_energised_tiles()
 
 
 ########################################################################################################################
@@ -179,11 +200,9 @@ def count_maximally_energised_tiles(lines: Iterable[str]) -> int:
         # Beams enter from the west wall.
         ((0, y, CardinalDirection.EAST) for y in range(contraption.height)),
     ))
-    return max(
-        sum(1 for row in contraption.simulate(starting_beamfront) for tile in row if tile)
-        for starting_beamfront
-        in starting_beamfronts
-    )
+    # Each simulation is independent of the others, so we farm them out across processes.
+    with ProcessPoolExecutor() as executor:
+        return max(executor.map(contraption.count_energised_tiles, starting_beamfronts, chunksize=16))
 
 
 ########################################################################################################################
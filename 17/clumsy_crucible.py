@@ -6,11 +6,11 @@
 ########################################################################################################################
 
 from collections.abc import Iterable, Iterator
-from dataclasses import dataclass, field
-from enum import Enum
+from enum import IntEnum
 from heapq import heappop, heappush
-from itertools import groupby
-from typing import NamedTuple, Optional
+from itertools import accumulate, chain, groupby, islice
+import sys
+from typing import NamedTuple
 
 
 ########################################################################################################################
@@ -22,35 +22,26 @@ class Coordinate(NamedTuple):
     y: int
 
 
-class CardinalDirection(Enum):
-    NORTH = 'N'
-    EAST = 'E'
-    SOUTH = 'S'
-    WEST = 'W'
+class CardinalDirection(IntEnum):
+    # We number directions clockwise, so that opposing directions differ only in their second bit.
+    NORTH = 0
+    EAST = 1
+    SOUTH = 2
+    WEST = 3
 
     @property
-    def reverse(self):
-        if self == CardinalDirection.NORTH:
-            return CardinalDirection.SOUTH
-        elif self == CardinalDirection.SOUTH:
-            return CardinalDirection.NORTH
-        elif self == CardinalDirection.EAST:
-            return CardinalDirection.WEST
-        elif self == CardinalDirection.WEST:
-            return CardinalDirection.EAST
-        else:
-            raise ValueError(f'Unexpected direction: {self!r}')
+    def reverse(self) -> 'CardinalDirection':
+        return CardinalDirection(self ^ 2)
 
 
-class Node(NamedTuple):
-    coord: Coordinate
-    restricted_direction: Optional[CardinalDirection]
-
-
-@dataclass(order=True, frozen=True)
-class NodeWithCost:
-    f_score: int
-    node: Node = field(hash=True, compare=False)
+DIRECTIONS = tuple(CardinalDirection)
+# The directions we can turn to after travelling in each direction (i.e., neither straight on nor backwards), indexed by
+# direction.
+TURNING_DIRECTIONS = tuple(
+    tuple(turning_direction for turning_direction in DIRECTIONS if turning_direction not in {direction, direction.reverse})
+    for direction
+    in DIRECTIONS
+)
 
 
 class Path(NamedTuple):
@@ -64,122 +55,154 @@ def manhattan_distance(a: Coordinate, b: Coordinate) -> int:
     return abs(a.x - b.x) + abs(a.y - b.y)
 
 
-def translate(width: int, height: int, coord: Coordinate, direction: CardinalDirection) -> Optional[Coordinate]:
-    (x, y) = coord
-    assert 0 <= x < width
-    assert 0 <= y < height
-    if direction == CardinalDirection.NORTH:
-        if y > 0:
-            return Coordinate(x, y - 1)
-    elif direction == CardinalDirection.SOUTH:
-        if y < height - 1:
-            return Coordinate(x, y + 1)
-    elif direction == CardinalDirection.EAST:
-        if x < width - 1:
-            return Coordinate(x + 1, y)
-    elif direction == CardinalDirection.WEST:
-        if x > 0:
-            return Coordinate(x - 1, y)
-    else:
-        raise ValueError(f'Unexpected direction: {direction!r}')
-    return None
+# The (dx, dy) of a single step in each direction, indexed by direction.
+DELTAS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+
+COSTS_BY_DIGIT = bytes.maketrans(b'0123456789', bytes(range(10)))
+DIGITS_BY_COST = bytes.maketrans(bytes(range(10)), b'0123456789')
 
 
 class Map(NamedTuple):
     width: int
     height: int
-    rows_costs: tuple[tuple[int, ...], ...]
+    # We store costs in one flat, row-major buffer, so that each lookup is a single index.
+    costs: bytes
 
     @classmethod
     def from_lines(cls, lines: Iterable[str]) -> 'Map':
         width = -1
-        rows_costs: list[tuple[int, ...]] = []
+        rows_costs: list[bytes] = []
         for (y, line) in enumerate(lines):
             # Ensure width is consistent across lines.
             if y == 0:
                 width = len(line)
             elif len(line) != width:
                 raise ValueError(f'Width of line {y + 1} differs from line 1 ({len(line)} ≠ {width})')
-            rows_costs.append(tuple(int(char) for char in line))
-        return Map(width, y + 1, tuple(rows_costs))
+            if not (line.isascii() and line.isdigit()):
+                raise ValueError(f'Unexpected non-digit on line {y + 1}: {line!r}')
+            rows_costs.append(line.encode('ascii').translate(COSTS_BY_DIGIT))
+        return Map(width, y + 1, b''.join(rows_costs))
 
     def __str__(self) -> str:
-        return '\n'.join(''.join(str(cost) for cost in row_costs) for row_costs in self.rows_costs)
+        digits = self.costs.translate(DIGITS_BY_COST).decode('ascii')
+        return '\n'.join(digits[i:i + self.width] for i in range(0, len(digits), self.width))
+
+    def find_minimal_heat_loss_lower_bounds(self, goal: Coordinate) -> list[int]:
+        """
+        Find, for each coordinate (in row-major order), the least heat loss incurred reaching the goal from there if we
+        could turn freely. This ignores the crucible's movement constraints, so is a lower bound on the true heat loss.
+
+        >>> Map.from_lines(['123', '456']).find_minimal_heat_loss_lower_bounds(Coordinate(2, 1))
+        [11, 9, 6, 11, 6, 0]
+        """
+        goal_i = (goal.y * self.width) + goal.x
+        lower_bounds = [sys.maxsize] * len(self.costs)
+        lower_bounds[goal_i] = 0
+        open_heapq = [(0, goal_i)]
+        while open_heapq:
+            (lower_bound, i) = heappop(open_heapq)
+            if lower_bound != lower_bounds[i]:
+                continue
+            # Stepping from any neighbour onto this coordinate costs this coordinate's heat loss.
+            lower_bound += self.costs[i]
+            (y, x) = divmod(i, self.width)
+            for (dx, dy) in DELTAS:
+                (prev_x, prev_y) = (x + dx, y + dy)
+                if (0 <= prev_x < self.width) and (0 <= prev_y < self.height):
+                    prev_i = (prev_y * self.width) + prev_x
+                    if lower_bound < lower_bounds[prev_i]:
+                        lower_bounds[prev_i] = lower_bound
+                        heappush(open_heapq, (lower_bound, prev_i))
+        return lower_bounds
 
     def find_minimal_heat_loss_path(self, start: Coordinate, goal: Coordinate, min_moves: int, max_moves: int) -> 'Path':
         assert 1 <= min_moves <= max_moves
 
-        open_set: set[Node] = set()
-        open_heapq: list[NodeWithCost] = []
-        came_from: dict[Node, Node] = {}
-        g_scores: dict[Node, int] = {}
-        f_scores: dict[Node, int] = {}
+        # We pack each node (a coordinate, and the direction we arrived there travelling in) into a single int, so that
+        # nodes hash and compare as cheaply as possible.
+        open_heapq: list[tuple[int, int, int]] = []
+        came_from: dict[int, int] = {}
+        # The node space is small and dense, so we index g-scores directly by packed node.
+        g_scores = [sys.maxsize] * (self.width * self.height * len(DIRECTIONS))
+
+        def pack_node(coord: Coordinate, restricted_direction: CardinalDirection) -> int:
+            return (((coord.y * self.width) + coord.x) * len(DIRECTIONS)) + restricted_direction
+
+        def unpack_node(node: int) -> tuple[Coordinate, CardinalDirection]:
+            (i, direction_index) = divmod(node, len(DIRECTIONS))
+            (y, x) = divmod(i, self.width)
+            return (Coordinate(x, y), DIRECTIONS[direction_index])
 
-        def add_to_open_set(next_node: Node, g_score: int):
+        def add_to_open_set(next_node: int, g_score: int):
             g_scores[next_node] = g_score
-            f_score = g_score + heuristic_cost(next_node.coord)
-            f_scores[next_node] = f_score
-            if next_node not in open_set:
-                open_set.add(next_node)
-                heappush(open_heapq, NodeWithCost(f_score, next_node))
-
-        def remove_from_open_set() -> Node:
-            node_with_cost = heappop(open_heapq)
-            open_set.remove(node_with_cost.node)
-            return node_with_cost.node
-
-        def heuristic_cost(coord: Coordinate):
-            return manhattan_distance(coord, goal)
-
-        def reconstruct_path(node: Node) -> Path:
-            assert node.coord == goal
-            assert node.restricted_direction
-            directions: tuple[CardinalDirection, ...] = ()
-            cost = f_scores[node]
+            # Heap entries are plain tuples, which compare in C. Among equally promising nodes, we prefer those furthest
+            # along (with the highest g-score), since they're closest to the goal.
+            heappush(open_heapq, (g_score + lower_bounds[next_node // len(DIRECTIONS)], -g_score, next_node))
+
+        # Our heuristic is the least heat loss from each coordinate to the goal, ignoring movement constraints. That's a
+        # far tighter (but still admissible) bound than the Manhattan distance.
+        lower_bounds = self.find_minimal_heat_loss_lower_bounds(goal)
+        goal_i = (goal.y * self.width) + goal.x
+
+        def reconstruct_path(node: int) -> Path:
+            (coord, restricted_direction) = unpack_node(node)
+            assert coord == goal
+            # We walk back from the goal, collecting each straight run of moves, and only assemble the full sequence of
+            # directions once we've reached the start.
+            reversed_runs: list[tuple[CardinalDirection, ...]] = []
+            cost = g_scores[node]
             while node in came_from:
-                prev_node = came_from[node]
-                directions = ((node.restricted_direction,) * manhattan_distance(prev_node.coord, node.coord)) + directions
-                node = prev_node
-                if not node.restricted_direction:
-                    assert node.coord == start
-                    break
-            return Path(start, goal, directions, cost)
+                node = came_from[node]
+                (prev_coord, prev_restricted_direction) = unpack_node(node)
+                reversed_runs.append((restricted_direction,) * manhattan_distance(prev_coord, coord))
+                (coord, restricted_direction) = (prev_coord, prev_restricted_direction)
+            assert coord == start
+            return Path(start, goal, tuple(chain.from_iterable(reversed(reversed_runs))), cost)
 
         def is_valid_path(path: Path) -> bool:
             return all(min_moves <= len(tuple(consecutive_directions)) <= max_moves
                        for (_, consecutive_directions)
                        in groupby(path.directions))
 
-        def enumerate_neighbouring_nodes(node: Node) -> Iterator[tuple[Node, int]]:
-            (coord, restricted_direction) = node
+        def enumerate_neighbouring_nodes(node: int) -> Iterator[tuple[int, int]]:
+            # This is the hottest part of the search, so we work directly with packed nodes and flat cell indices.
+            (width, height, costs) = (self.width, self.height, self.costs)
+            (i, restricted_direction) = divmod(node, len(DIRECTIONS))
+            (y, x) = divmod(i, width)
+            strides = (-width, 1, width, -1)
+            # We can't move further in any direction than the map extent.
+            max_moves_by_direction = (y, width - 1 - x, height - 1 - y, x)
             # For simplicity, when enumerating neighbouring nodes, we assume we've gotten to this node by travelling
             # `max_moves` already. Also, we enforce not being able to traverse backwards.
-            restricted_directions = {restricted_direction, restricted_direction.reverse} if restricted_direction else set()
-            for next_direction in CardinalDirection:
-                if next_direction in restricted_directions:
+            for next_direction in TURNING_DIRECTIONS[restricted_direction]:
+                stride = strides[next_direction]
+                num_moves = min(max_moves, max_moves_by_direction[next_direction])
+                if num_moves < min_moves:
                     continue
-                next_coord: Optional[Coordinate] = coord
-                h_score = 0
-                for i in range(max_moves):
-                    assert next_coord
-                    next_coord = translate(self.width, self.height, next_coord, next_direction)
-                    if not next_coord:
-                        # We've hit the map extent.
-                        break
-                    h_score += self.rows_costs[next_coord.y][next_coord.x]
-                    if i >= min_moves - 1:
-                        yield (Node(next_coord, next_direction), h_score)
-
-        add_to_open_set(Node(start, None), 0)
-        while open_set:
-            node = remove_from_open_set()
-            if node.coord == goal:
+                # We slice out the costs of every tile along this run in one go, and accumulate them as we move along.
+                stop = i + (stride * (num_moves + 1))
+                run_costs = costs[i + stride:(stop if stop >= 0 else None):stride]
+                h_scores = islice(accumulate(run_costs), min_moves - 1, None)
+                for (moves, h_score) in enumerate(h_scores, min_moves):
+                    yield (((i + (stride * moves)) * len(DIRECTIONS)) + next_direction, h_score)
+
+        # Rather than special-casing the start node (which has no restricted direction), we seed the search with the
+        # start node restricted in each axis; between them, every direction is open.
+        add_to_open_set(pack_node(start, CardinalDirection.NORTH), 0)
+        add_to_open_set(pack_node(start, CardinalDirection.EAST), 0)
+        while open_heapq:
+            (_, negated_g_score, node) = heappop(open_heapq)
+            if -negated_g_score != g_scores[node]:
+                # Rather than updating entries in place when we find a cheaper route to a node, we leave stale entries
+                # in the heap, and skip over them here.
+                continue
+            if node // len(DIRECTIONS) == goal_i:
                 best_path = reconstruct_path(node)
                 assert is_valid_path(best_path)
                 return best_path
             for (next_node, h_score) in enumerate_neighbouring_nodes(node):
                 tentative_g_score = g_scores[node] + h_score
-                if (next_node not in g_scores) or (tentative_g_score < g_scores[next_node]):
+                if tentative_g_score < g_scores[next_node]:
                     came_from[next_node] = node
                     add_to_open_set(next_node, tentative_g_score)
 
@@ -5,30 +5,16 @@
 # Imports
 ########################################################################################################################
 
-from collections.abc import Iterable, Iterator
+from collections.abc import Iterable
 from enum import Enum
 import re
-from typing import Callable, NamedTuple
+from typing import Callable, NamedTuple, Optional
 
 
 ########################################################################################################################
 # Dig plan
 ########################################################################################################################
 
-def pairs(iterable: Iterable[int]) -> Iterator[tuple[int, int]]:
-    iter_ = iter(iterable)
-    while True:
-        try:
-            a = next(iter_)
-        except StopIteration:
-            return
-        try:
-            b = next(iter_)
-        except StopIteration:
-            raise ValueError(f'Cannot finish pairing off odd number of elements in iterable; {a!r} is alone')
-        yield (a, b)
-
-
 class Direction(Enum):
     UP = 'U'
     RIGHT = 'R'
@@ -36,31 +22,51 @@ class Direction(Enum):
     LEFT = 'L'
 
     @property
-    def reverse(self):
-        return {
-            Direction.UP: Direction.DOWN,
-            Direction.RIGHT: Direction.LEFT,
-            Direction.DOWN: Direction.UP,
-            Direction.LEFT: Direction.RIGHT,
-        }[self]
+    def reverse(self) -> 'Direction':
+        return REVERSE_DIRECTIONS[self]
 
     @property
-    def clockwise_orthogonal(self):
-        return {
-            Direction.UP: Direction.RIGHT,
-            Direction.RIGHT: Direction.DOWN,
-            Direction.DOWN: Direction.LEFT,
-            Direction.LEFT: Direction.UP,
-        }[self]
+    def clockwise_orthogonal(self) -> 'Direction':
+        return CLOCKWISE_ORTHOGONAL_DIRECTIONS[self]
 
     @property
-    def anticlockwise_orthogonal(self):
-        return {
-            Direction.UP: Direction.LEFT,
-            Direction.RIGHT: Direction.UP,
-            Direction.DOWN: Direction.RIGHT,
-            Direction.LEFT: Direction.DOWN,
-        }[self]
+    def anticlockwise_orthogonal(self) -> 'Direction':
+        return ANTICLOCKWISE_ORTHOGONAL_DIRECTIONS[self]
+
+
+# We build these mappings once, rather than on every property access.
+REVERSE_DIRECTIONS = {
+    Direction.UP: Direction.DOWN,
+    Direction.RIGHT: Direction.LEFT,
+    Direction.DOWN: Direction.UP,
+    Direction.LEFT: Direction.RIGHT,
+}
+CLOCKWISE_ORTHOGONAL_DIRECTIONS = {
+    Direction.UP: Direction.RIGHT,
+    Direction.RIGHT: Direction.DOWN,
+    Direction.DOWN: Direction.LEFT,
+    Direction.LEFT: Direction.UP,
+}
+ANTICLOCKWISE_ORTHOGONAL_DIRECTIONS = {
+    Direction.UP: Direction.LEFT,
+    Direction.RIGHT: Direction.UP,
+    Direction.DOWN: Direction.RIGHT,
+    Direction.LEFT: Direction.DOWN,
+}
+# Any direction is allowed first; thereafter, each instruction must turn through a right angle from the last.
+ALL_DIRECTIONS = frozenset(Direction)
+ORTHOGONAL_DIRECTIONS = {
+    direction: frozenset((direction.clockwise_orthogonal, direction.anticlockwise_orthogonal))
+    for direction
+    in Direction
+}
+# The (dx, dy) of a single step in each direction.
+DELTAS = {
+    Direction.UP: (0, -1),
+    Direction.RIGHT: (1, 0),
+    Direction.DOWN: (0, 1),
+    Direction.LEFT: (-1, 0),
+}
 
 
 class Coordinate(NamedTuple):
@@ -68,16 +74,8 @@ class Coordinate(NamedTuple):
     y: int
 
     def translate(self, direction: Direction, length: int) -> 'Coordinate':
-        if direction == Direction.UP:
-            return Coordinate(self.x, self.y - length)
-        elif direction == Direction.RIGHT:
-            return Coordinate(self.x + length, self.y)
-        elif direction == Direction.DOWN:
-            return Coordinate(self.x, self.y + length)
-        elif direction == Direction.LEFT:
-            return Coordinate(self.x - length, self.y)
-        else:
-            raise ValueError(f'Unexpected direction: {direction!r}')
+        (dx, dy) = DELTAS[direction]
+        return Coordinate(self.x + (dx * length), self.y + (dy * length))
 
 
 RGB_HEXADECIMAL_COLOUR_CODE_PATTERN = re.compile(r'^#([0-9a-f]{2})([0-9a-f]{2})([0-9a-f]{2})$')
@@ -93,11 +91,37 @@ class Colour(NamedTuple):
         match = RGB_HEXADECIMAL_COLOUR_CODE_PATTERN.fullmatch(colour_code)
         if not match:
             raise ValueError(f'Invalid RGB hexadecimal colour code: {colour_code!r}')
-        return Colour(*(int(component, 16) for component in match.groups()))
+        return Colour(int(match[1], 16), int(match[2], 16), int(match[3], 16))
+
+
+HEXADECIMAL_DIGITS = frozenset('0123456789abcdef')
+
+
+def split_dig_instruction(line: str) -> tuple[str, str, str]:
+    """
+    Split a dig instruction of the form `<direction> <length> (#<colour>)` into its raw direction, length, and colour
+    code. The grammar is simple enough that we can validate it with string methods alone.
+
+    >>> split_dig_instruction('R 6 (#70c710)')
+    ('R', '6', '#70c710')
+    >>> split_dig_instruction('R 06 (#70c710)')
+    Traceback (most recent call last):
+        ...
+    ValueError: Invalid dig instruction: 'R 06 (#70c710)'
+    """
+    parts = line.split(' ')
+    if len(parts) == 3:
+        (raw_direction, raw_length, raw_colour) = parts
+        if (raw_direction in ('D', 'L', 'R', 'U')) and \
+           raw_length.isascii() and raw_length.isdigit() and (raw_length[0] != '0') and \
+           (len(raw_colour) == 9) and raw_colour.startswith('(#') and raw_colour.endswith(')') and \
+           HEXADECIMAL_DIGITS.issuperset(raw_colour[2:8]):
+            return (raw_direction, raw_length, raw_colour[1:8])
+    raise ValueError(f'Invalid dig instruction: {line!r}')
 
 
-DIG_INSTRUCTION_PATTERN = re.compile(r'^([DLRU]) ([1-9]\d*) \((#[0-9a-f]{6})\)$')
-CORRECT_DIG_INSTRUCTION_PATTERN = re.compile(r'^[DLRU] [1-9]\d* \(#([0-9a-f]{5})([0-3])\)$')
+# The directions encoded by the last hexadecimal digit of a (correct) dig instruction.
+CORRECT_DIRECTIONS = (Direction.RIGHT, Direction.DOWN, Direction.LEFT, Direction.UP)
 
 
 class DigInstruction(NamedTuple):
@@ -105,69 +129,50 @@ class DigInstruction(NamedTuple):
     end_grid_coord: Coordinate
     direction: Direction
     length: int
-    colour: Colour
+    # Corrected instructions repurpose the colour code, so they have no colour.
+    colour: Optional[Colour] = None
 
     @classmethod
-    def from_line(cls, line: str, start_grid_coord: Coordinate, allowed_directions: set[Direction]) -> 'DigInstruction':
-        match = DIG_INSTRUCTION_PATTERN.fullmatch(line)
-        if not match:
-            raise ValueError(f'Invalid dig instruction: {line!r}')
-        (raw_direction, raw_length, raw_colour) = match.groups()
+    def from_line(cls, line: str, start_grid_coord: Coordinate, allowed_directions: frozenset[Direction]) -> 'DigInstruction':
+        (raw_direction, raw_length, raw_colour) = split_dig_instruction(line)
         direction = Direction(raw_direction)
         if direction not in allowed_directions:
             raise ValueError(f'Invalid dig instruction (direction not allowed): {line!r}')
         length = int(raw_length)
         end_grid_coord = start_grid_coord.translate(direction, length)
-        colour = Colour.from_rgb_hexadecimal_colour_code(raw_colour)
+        # We've already validated the colour code, so we can slice its components out directly.
+        colour = Colour(int(raw_colour[1:3], 16), int(raw_colour[3:5], 16), int(raw_colour[5:7], 16))
         return DigInstruction(start_grid_coord, end_grid_coord, direction, length, colour)
 
     @classmethod
-    def from_correct_line(cls, line: str, start_grid_coord: Coordinate, allowed_directions: set[Direction]) -> 'DigInstruction':
-        match = CORRECT_DIG_INSTRUCTION_PATTERN.fullmatch(line)
-        if not match:
+    def from_correct_line(cls, line: str, start_grid_coord: Coordinate, allowed_directions: frozenset[Direction]) -> 'DigInstruction':
+        (_, _, raw_colour) = split_dig_instruction(line)
+        # The first five hexadecimal digits encode the length, and the last the direction; so we parse all six at once,
+        # and split off the last four bits.
+        (length, direction_code) = divmod(int(raw_colour[1:], 16), 16)
+        if direction_code >= len(CORRECT_DIRECTIONS):
             raise ValueError(f'Invalid dig instruction: {line!r}')
-        (raw_length, raw_direction) = match.groups()
-        length = int(raw_length, 16)
-        direction = [
-            Direction.RIGHT,
-            Direction.DOWN,
-            Direction.LEFT,
-            Direction.UP,
-        ][int(raw_direction)]
+        direction = CORRECT_DIRECTIONS[direction_code]
         if direction not in allowed_directions:
             raise ValueError(f'Invalid dig instruction (direction not allowed): {line!r}')
         end_grid_coord = start_grid_coord.translate(direction, length)
-        return DigInstruction(start_grid_coord, end_grid_coord, direction, length, Colour(0, 0, 0))
+        return DigInstruction(start_grid_coord, end_grid_coord, direction, length)
 
 
 class DigPlan(NamedTuple):
-    max_grid_coord: Coordinate
     instructions: tuple[DigInstruction, ...]
-    span_grid_coords_by_row: dict[int, tuple[tuple[int, int], ...]]
 
     @classmethod
-    def from_lines(cls, lines: Iterable[str], instruction_parser: Callable[[str, Coordinate, set[Direction]], DigInstruction]) -> 'DigPlan':
+    def from_lines(cls, lines: Iterable[str], instruction_parser: Callable[[str, Coordinate, frozenset[Direction]], DigInstruction]) -> 'DigPlan':
         instructions: list[DigInstruction] = []
         origin_grid_coord = Coordinate(0, 0)
-        min_grid_coord = origin_grid_coord
-        max_grid_coord = origin_grid_coord
         start_grid_coord = origin_grid_coord
-        allowed_directions = {Direction.UP, Direction.RIGHT, Direction.DOWN, Direction.LEFT}
+        allowed_directions = ALL_DIRECTIONS
         for line in lines:
             instruction = instruction_parser(line, start_grid_coord, allowed_directions)
-
-            if instruction.end_grid_coord.x < min_grid_coord.x:
-                min_grid_coord = Coordinate(instruction.end_grid_coord.x, min_grid_coord.y)
-            if instruction.end_grid_coord.y < min_grid_coord.y:
-                min_grid_coord = Coordinate(min_grid_coord.x, instruction.end_grid_coord.y)
-            if instruction.end_grid_coord.x > max_grid_coord.x:
-                max_grid_coord = Coordinate(instruction.end_grid_coord.x, max_grid_coord.y)
-            if instruction.end_grid_coord.y > max_grid_coord.y:
-                max_grid_coord = Coordinate(max_grid_coord.x, instruction.end_grid_coord.y)
-
             instructions.append(instruction)
             start_grid_coord = instruction.end_grid_coord
-            allowed_directions = {instruction.direction.clockwise_orthogonal, instruction.direction.anticlockwise_orthogonal}
+            allowed_directions = ORTHOGONAL_DIRECTIONS[instruction.direction]
         if instruction.end_grid_coord != origin_grid_coord:
             raise ValueError(f'Sequence of instructions do not return to the origin: {instructions!r}')
         if instructions[0].direction not in allowed_directions:
@@ -175,90 +180,21 @@ class DigPlan(NamedTuple):
             # lie on a straight line)/
             raise ValueError(f'Sequence of instructions do not return to the origin in a permissible manner: {instructions!r}')
 
-        translated_instructions = tuple(DigInstruction(
-            Coordinate(instruction.start_grid_coord.x - min_grid_coord.x, instruction.start_grid_coord.y - min_grid_coord.y),
-            Coordinate(instruction.end_grid_coord.x - min_grid_coord.x, instruction.end_grid_coord.y - min_grid_coord.y),
-            instruction.direction,
-            instruction.length,
-            instruction.colour,
-        ) for instruction in instructions)
-        translated_max_grid_coord = Coordinate(max_grid_coord.x - min_grid_coord.x, max_grid_coord.y - min_grid_coord.y)
-
-        corner_grid_coords_by_row: dict[int, set[int]] = {}
-        for translated_instruction in translated_instructions:
-            row_corner_grid_coords = corner_grid_coords_by_row.setdefault(translated_instruction.end_grid_coord.y, set())
-            row_corner_grid_coords.add(translated_instruction.end_grid_coord.x)
-        span_grid_coords_by_row = {y: tuple(span for span in pairs(sorted(row_corner_grid_coords))) for (y, row_corner_grid_coords) in corner_grid_coords_by_row.items()}
-
-        return DigPlan(translated_max_grid_coord, translated_instructions, span_grid_coords_by_row)
+        # Nothing downstream needs the instructions translated into non-negative coordinates (the volume is translation
+        # invariant), so we keep them as parsed, rather than building each a second time.
+        return DigPlan(tuple(instructions))
 
     def calculate_volume(self) -> int:
-        volume = 0
-        mask_spans: list[tuple[int, int]] = []
-        prev_y = -1
-        for y in sorted(self.span_grid_coords_by_row.keys()):
-            row_spans = self.span_grid_coords_by_row[y]
-            should_skip_mask_update = False
-            if not mask_spans:
-                mask_spans = list(row_spans)
-                should_skip_mask_update = True
-            height = y - prev_y
-            for (mask_span_start, mask_span_end) in mask_spans:
-                volume += height * (mask_span_end - mask_span_start + 1)
-            prev_y = y
-            if should_skip_mask_update:
-                continue
-            for row_span in row_spans:
-                (row_span_start, row_span_end) = row_span
-                for (i, mask_span) in enumerate(mask_spans):
-                    (mask_span_start, mask_span_end) = mask_span
-                    if row_span_end < mask_span_start:
-                        # Row span is disjoint, strictly to the left of the mask span. Add to mask spans.
-                        mask_spans.insert(i, row_span)
-                        volume += row_span_end - row_span_start + 1
-                        break
-                    elif row_span_end == mask_span_start:
-                        # Row span's right side touches mask span's left side. Extend mask span.
-                        mask_spans[i] = (row_span_start, mask_span_end)
-                        volume += row_span_end - row_span_start
-                        break
-                    elif row_span == mask_span:
-                        # Row span and mask span are identical. Delete mask span.
-                        mask_spans.pop(i)
-                        break
-                    elif mask_span_start <= row_span_start and row_span_end <= mask_span_end:
-                        # Row span is covered by mask span. Subtract mask span.
-                        mask_spans.pop(i)
-                        if row_span_end != mask_span_end:
-                            mask_spans.insert(i, (row_span_end, mask_span_end))
-                        if mask_span_start != row_span_start:
-                            mask_spans.insert(i, (mask_span_start, row_span_start))
-                        break
-                    elif mask_span_end == row_span_start:
-                        # Row span's left side touches mask span's right side. Extend mask span.
-                        mask_spans[i] = (mask_span_start, row_span_end)
-                        volume += row_span_end - row_span_start
-                        break
-                    elif i == len(mask_spans) - 1:
-                        # We've exhausted all mask spans. Row span must be disjoint, strictly to the right of the mask
-                        # span. Add to mask spans.
-                        mask_spans.append(row_span)
-                        volume += row_span_end - row_span_start + 1
-                        break
-                # Compaction pass.
-                i = 0
-                while i < (len(mask_spans) - 1):
-                    (mask_span_start, mask_span_end) = mask_spans[i]
-                    (next_mask_span_start, next_mask_span_end) = mask_spans[i + 1]
-                    if next_mask_span_start == mask_span_end:
-                        mask_spans.pop(i)
-                        mask_spans.pop(i)
-                        mask_spans.insert(i, (mask_span_start, next_mask_span_end))
-                        volume -= 1
-                    i += 1
-        # We should wind up with an empty mask at the very end.
-        assert not mask_spans
-        return volume
+        # The instructions trace out a closed, rectilinear polygon through the centres of the boundary cubes. The shoelace
+        # formula gives us that polygon's area; by Pick's theorem, adding half the perimeter (plus one) then counts every
+        # cube on or inside the boundary.
+        double_area = 0
+        perimeter = 0
+        for instruction in self.instructions:
+            ((start_x, start_y), (end_x, end_y)) = (instruction.start_grid_coord, instruction.end_grid_coord)
+            double_area += (start_x * end_y) - (end_x * start_y)
+            perimeter += instruction.length
+        return (abs(double_area) // 2) + (perimeter // 2) + 1
 
 
 ########################################################################################################################
@@ -5,18 +5,18 @@
 # Imports
 ########################################################################################################################
 
+from collections import deque
 from collections.abc import Iterable, Iterator
 from math import prod
-import operator
 import re
-from typing import Callable, NamedTuple, Optional, Union
+from typing import NamedTuple, Optional, Union
 
 
 ########################################################################################################################
 # Workflows and part ratings
 ########################################################################################################################
 
-PART_RATINGS_PATTERN = re.compile(r'^{x=(\d+),m=(\d+),a=(\d+),s=(\d+)}$')
+RATING_DELIMITER = ','
 
 
 class PartRatings(NamedTuple):
@@ -27,13 +27,35 @@ class PartRatings(NamedTuple):
 
     @classmethod
     def from_line(cls, line: str) -> 'PartRatings':
-        match = PART_RATINGS_PATTERN.fullmatch(line)
-        if not match:
-            raise ValueError(f'Invalid part ratings: {line!r}')
-        return PartRatings(*(int(score) for score in match.groups()))
+        """
+        Parse part ratings of the form `{x=<x>,m=<m>,a=<a>,s=<s>}`. The grammar is rigid enough that we can validate it
+        with string methods alone.
+
+        >>> PartRatings.from_line('{x=787,m=2655,a=1222,s=2876}')
+        PartRatings(x=787, m=2655, a=1222, s=2876)
+        >>> PartRatings.from_line('{x=787,m=2655,s=2876,a=1222}')
+        Traceback (most recent call last):
+            ...
+        ValueError: Invalid part ratings: '{x=787,m=2655,s=2876,a=1222}'
+        >>> PartRatings.from_line('{x=787,m=2655,a=-1,s=2876}')
+        Traceback (most recent call last):
+            ...
+        ValueError: Invalid part ratings: '{x=787,m=2655,a=-1,s=2876}'
+        """
+        if line.startswith('{') and line.endswith('}'):
+            fields = line[1:-1].split(RATING_DELIMITER)
+            if len(fields) == 4:
+                (raw_x, raw_m, raw_a, raw_s) = fields
+                raw_ratings = (raw_x[2:], raw_m[2:], raw_a[2:], raw_s[2:])
+                if raw_x.startswith('x=') and raw_m.startswith('m=') and raw_a.startswith('a=') and \
+                   raw_s.startswith('s=') and all(raw.isascii() and raw.isdigit() for raw in raw_ratings):
+                    return PartRatings._make(map(int, raw_ratings))
+        raise ValueError(f'Invalid part ratings: {line!r}')
 
 
 RULE_PATTERN = re.compile(r'(?:([amsx])([<>])(\d+):)?([AR]|[a-z]+)')
+# We look up each pattern's bound fullmatch method once, rather than on every line.
+FULLMATCH_RULE = RULE_PATTERN.fullmatch
 LT_OP = '<'
 GT_OP = '>'
 ACCEPT_ACTION = 'A'
@@ -41,43 +63,38 @@ REJECT_ACTION = 'R'
 
 
 class Rule(NamedTuple):
-    category_comparison_threshold: Optional[tuple[str, str, int]]
-    condition: Callable[[PartRatings], bool]
-    action: Union[bool, str]
+    # The index of the category to compare (into `PartRatings`), how to compare it, and against what threshold; or
+    # `None` if the rule is unconditional.
+    category_comparison_threshold: Optional[tuple[int, str, int]]
+    # Accept (`True`), reject (`False`), or send to another workflow (either by name, or once linked, by reference).
+    action: Union[bool, str, 'Workflow']
 
     @classmethod
     def from_string(cls, string: str) -> 'Rule':
-        match = RULE_PATTERN.fullmatch(string)
+        match = FULLMATCH_RULE(string)
         if not match:
             raise ValueError(f'Invalid rule: {string!r}')
-        (raw_a, raw_op, raw_b, raw_action) = match.groups()
+        raw_a = match[1]
+        raw_op = match[2]
+        raw_b = match[3]
+        raw_action = match[4]
+        category_comparison_threshold: Optional[tuple[int, str, int]]
         if raw_a is raw_op is raw_b is None:
             category_comparison_threshold = None
-
-            def condition(part_ratings: PartRatings) -> bool:
-                return True
         else:
-            a_getter = operator.attrgetter(raw_a)
-            if raw_op == LT_OP:
-                op = operator.lt
-            elif raw_op == GT_OP:
-                op = operator.gt
-            else:
+            if raw_op not in {LT_OP, GT_OP}:
                 raise ValueError(f'Invalid rule (unexpected operator): {string!r}')
-            b = int(raw_b)
-            category_comparison_threshold = (raw_a, raw_op, b)
-
-            def condition(part_ratings: PartRatings) -> bool:
-                return op(a_getter(part_ratings), b)
+            category_comparison_threshold = (PartRatings._fields.index(raw_a), raw_op, int(raw_b))
         action: Union[bool, str] = (
             True if raw_action == ACCEPT_ACTION else
             False if raw_action == REJECT_ACTION else
             raw_action
         )
-        return Rule(category_comparison_threshold, condition, action)
+        return Rule(category_comparison_threshold, action)
 
 
 WORKFLOW_PATTERN = re.compile(r'^([a-z]+){([^}]+)}$')
+FULLMATCH_WORKFLOW = WORKFLOW_PATTERN.fullmatch
 RULE_DELIMITER = ','
 
 
@@ -87,10 +104,11 @@ class Workflow(NamedTuple):
 
     @classmethod
     def from_line(cls, line: str) -> 'Workflow':
-        match = WORKFLOW_PATTERN.fullmatch(line)
+        match = FULLMATCH_WORKFLOW(line)
         if not match:
             raise ValueError(f'Invalid workflow: {line!r}')
-        (name, raw_rules) = match.groups()
+        name = match[1]
+        raw_rules = match[2]
         rules = tuple(Rule.from_string(raw_rule) for raw_rule in raw_rules.split(RULE_DELIMITER))
         return Workflow(name, rules)
 
@@ -123,30 +141,63 @@ def parse_workflows(lines: Iterator[str]) -> dict[str, Workflow]:
     return workflows
 
 
+def link_workflows(workflows: dict[str, Workflow]) -> Workflow:
+    """
+    Resolve each rule sending parts to another workflow (by name) into a direct reference to that workflow, returning
+    the linked entry workflow. This saves looking workflows up by name as we process each part.
+    """
+    linked_workflows: dict[str, Workflow] = {}
+    linking_workflows: set[str] = set()
+
+    def link_workflow(name: str) -> Workflow:
+        if name in linked_workflows:
+            return linked_workflows[name]
+        if name in linking_workflows:
+            raise ValueError(f'Cycle detected when linking workflow {name!r}; already linking workflows {linking_workflows!r}')
+        linking_workflows.add(name)
+        workflow = workflows[name]
+        linked_workflow = workflow._replace(rules=tuple(
+            rule._replace(action=link_workflow(rule.action)) if isinstance(rule.action, str) else rule
+            for rule
+            in workflow.rules
+        ))
+        linking_workflows.remove(name)
+        linked_workflows[name] = linked_workflow
+        return linked_workflow
+
+    return link_workflow(ENTRY_WORKFLOW_NAME)
+
+
 ########################################################################################################################
 # Part 1
 ########################################################################################################################
 
-def is_part_accepted(part_ratings: PartRatings, workflows: dict[str, Workflow]):
-    applied_workflows: set[str] = set()
-    workflow = workflows[ENTRY_WORKFLOW_NAME]
+def is_part_accepted(part_ratings: PartRatings, entry_workflow: Workflow):
+    """
+    >>> entry_workflow = link_workflows(parse_workflows(iter(['in{s<1351:A,x>20:R,px}', 'px{m<5:A,R}', ''])))
+    >>> is_part_accepted(PartRatings(1, 2, 3, 4), entry_workflow)
+    True
+    >>> is_part_accepted(PartRatings(1, 2, 3, 2000), entry_workflow)
+    True
+    >>> is_part_accepted(PartRatings(1, 5, 3, 2000), entry_workflow)
+    False
+    """
+    # Linking has already ruled out cycles, so we needn't track which workflows we've applied.
+    workflow = entry_workflow
     while True:
-        if workflow.name in applied_workflows:
-            raise ValueError(f'Cycle detected when processing {part_ratings!r}; '
-                             f'revisiting workflow {workflow.name!r} '
-                             f'after already visiting workflows {applied_workflows!r}')
-        applied_workflows.add(workflow.name)
-        has_matched_rule = False
-        for rule in workflow.rules:
-            if rule.condition(part_ratings):
-                if isinstance(rule.action, bool):
-                    return rule.action
-                workflow = workflows[rule.action]
-                has_matched_rule = True
-                break
-        if not has_matched_rule:
-            raise ValueError(f'Matched no rules when processing {part_ratings!r} '
-                             f'with workflow {workflow!r}; already visited workflows {applied_workflows!r}')
+        for (category_comparison_threshold, action) in workflow.rules:
+            if category_comparison_threshold is not None:
+                (category_index, comparison, threshold) = category_comparison_threshold
+                rating = part_ratings[category_index]
+                if not ((rating < threshold) if (comparison == LT_OP) else (rating > threshold)):
+                    continue
+            # Actions are only ever the `True` and `False` singletons or a linked workflow, so identity checks suffice.
+            if action is True or action is False:
+                return action
+            workflow = action
+            break
+        else:
+            raise ValueError(f'Matched no rules when processing {part_ratings!r} with workflow {workflow.name!r}')
 
 
 def sum_accepted_parts_ratings(lines: Iterable[str]) -> int:
@@ -173,9 +224,9 @@ def sum_accepted_parts_ratings(lines: Iterable[str]) -> int:
     19114
     """
     lines_iter = iter(lines)
-    workflows = parse_workflows(lines_iter)
+    entry_workflow = link_workflows(parse_workflows(lines_iter))
     parts_ratings = (PartRatings.from_line(line) for line in lines_iter)
-    return sum(sum(part_ratings) for part_ratings in parts_ratings if is_part_accepted(part_ratings, workflows))
+    return sum(sum(part_ratings) for part_ratings in parts_ratings if is_part_accepted(part_ratings, entry_workflow))
 
 
 ########################################################################################################################
@@ -188,33 +239,25 @@ class Range(NamedTuple):
 
 
 class PartRatingsRanges(NamedTuple):
-    x: tuple[Range, ...]
-    m: tuple[Range, ...]
-    a: tuple[Range, ...]
-    s: tuple[Range, ...]
-
-    def split(self, category: str, comparison: str, threshold: int) -> tuple[Optional['PartRatingsRanges'], Optional['PartRatingsRanges']]:
-        ranges = operator.attrgetter(category)(self)
+    # Splitting a range by a threshold always leaves contiguous halves, so each category only ever needs the one range.
+    x: Range
+    m: Range
+    a: Range
+    s: Range
+
+    def split(self, category_index: int, comparison: str, threshold: int) -> tuple[Optional['PartRatingsRanges'], Optional['PartRatingsRanges']]:
+        (min_inclusive, max_inclusive) = self[category_index]
         assert comparison in {LT_OP, GT_OP}
         if comparison == LT_OP:
-            # We'll split the affected ranges into what's less than or equal to some threshold, and what's greater than
+            # We'll split the affected range into what's less than or equal to some threshold, and what's greater than
             # that threshold. If the comparison is less than, then after adjusting the threshold, the matching half is
-            # the smaller ranges. If the comparison is greater than, then the matching half is the larger ranges.
+            # the smaller range. If the comparison is greater than, then the matching half is the larger range.
             threshold -= 1
-        smaller_ranges: list[Range] = []
-        larger_ranges: list[Range] = []
-        for range_ in ranges:
-            (min_inclusive, max_inclusive) = range_
-            if max_inclusive <= threshold:
-                smaller_ranges.append(range_)
-            elif min_inclusive <= threshold < max_inclusive:
-                smaller_ranges.append(Range(min_inclusive, threshold))
-                larger_ranges.append(Range(threshold + 1, max_inclusive))
-            else:
-                assert threshold < min_inclusive
-                larger_ranges.append(range_)
-        smaller_part_ratings_ranges = None if not smaller_ranges else self._replace(**{category: tuple(smaller_ranges)})
-        larger_part_ratings_ranges = None if not larger_ranges else self._replace(**{category: tuple(larger_ranges)})
+        (before, after) = (self[:category_index], self[category_index + 1:])
+        smaller_part_ratings_ranges = None if threshold < min_inclusive else \
+            PartRatingsRanges._make(before + (Range(min_inclusive, min(threshold, max_inclusive)),) + after)
+        larger_part_ratings_ranges = None if max_inclusive <= threshold else \
+            PartRatingsRanges._make(before + (Range(max(threshold + 1, min_inclusive), max_inclusive),) + after)
         if comparison == LT_OP:
             return (smaller_part_ratings_ranges, larger_part_ratings_ranges)
         elif comparison == GT_OP:
@@ -223,7 +266,7 @@ class PartRatingsRanges(NamedTuple):
             raise ValueError(f'Unexpected comparison: {comparison!r}')
 
     def count_distinct_combinations(self) -> int:
-        return prod(sum((max_inclusive - min_inclusive + 1) for (min_inclusive, max_inclusive) in ranges) for ranges in self)
+        return prod((max_inclusive - min_inclusive + 1) for (min_inclusive, max_inclusive) in self)
 
 
 def count_distinct_accepted_combinations(lines: Iterable[str]) -> int:
@@ -249,38 +292,52 @@ def count_distinct_accepted_combinations(lines: Iterable[str]) -> int:
     ... ])
     167409079868000
     """
-    workflows = parse_workflows(iter(lines))
-    permissible_part_ratings_ranges = PartRatingsRanges((Range(1, 4000),), (Range(1, 4000),), (Range(1, 4000),), (Range(1, 4000),))
-    unresolved_combinations: list[tuple[PartRatingsRanges, Workflow]] = [
-        (permissible_part_ratings_ranges, workflows[ENTRY_WORKFLOW_NAME]),
-    ]
+    entry_workflow = link_workflows(parse_workflows(iter(lines)))
+    permissible_part_ratings_ranges = PartRatingsRanges(Range(1, 4000), Range(1, 4000), Range(1, 4000), Range(1, 4000))
     total_distinct_combinations = permissible_part_ratings_ranges.count_distinct_combinations()
+    # Each split only narrows one category's range, so rather than recounting combinations from scratch, we carry each
+    # set of ranges' count along with it and rescale it by the narrowed range's width.
+    unresolved_combinations: deque[tuple[PartRatingsRanges, int, Workflow]] = deque([
+        (permissible_part_ratings_ranges, total_distinct_combinations, entry_workflow),
+    ])
     distinct_accepted_combinations = 0
     distinct_rejected_combinations = 0
     while unresolved_combinations:
-        (part_ratings_ranges, workflow) = unresolved_combinations.pop(0)
+        (part_ratings_ranges, distinct_combinations, workflow) = unresolved_combinations.popleft()
         unmatched_part_ratings_ranges: Optional[PartRatingsRanges] = part_ratings_ranges
-        for rule in workflow.rules:
+        unmatched_distinct_combinations = distinct_combinations
+        # We unpack each rule as we go, rather than going through its fields' descriptors every time we need them.
+        for (category_comparison_threshold, action) in workflow.rules:
             if unmatched_part_ratings_ranges is None:
                 break
             matched_part_ratings_ranges: Optional[PartRatingsRanges] = None
-            if rule.category_comparison_threshold is None:
+            if category_comparison_threshold is None:
                 # Unconditional match.
                 matched_part_ratings_ranges = unmatched_part_ratings_ranges
+                matched_distinct_combinations = unmatched_distinct_combinations
                 unmatched_part_ratings_ranges = None
             else:
-                (matched_part_ratings_ranges, unmatched_part_ratings_ranges) = unmatched_part_ratings_ranges.split(*rule.category_comparison_threshold)
+                category_index = category_comparison_threshold[0]
+                (min_inclusive, max_inclusive) = unmatched_part_ratings_ranges[category_index]
+                (matched_part_ratings_ranges, unmatched_part_ratings_ranges) = unmatched_part_ratings_ranges.split(*category_comparison_threshold)
+                if matched_part_ratings_ranges is None:
+                    matched_distinct_combinations = 0
+                else:
+                    (matched_min_inclusive, matched_max_inclusive) = matched_part_ratings_ranges[category_index]
+                    matched_distinct_combinations = unmatched_distinct_combinations // (max_inclusive - min_inclusive + 1) \
+                        * (matched_max_inclusive - matched_min_inclusive + 1)
+            unmatched_distinct_combinations -= matched_distinct_combinations
             if matched_part_ratings_ranges is not None:
-                if isinstance(rule.action, bool):
-                    if rule.action:
-                        distinct_accepted_combinations += matched_part_ratings_ranges.count_distinct_combinations()
-                    else:
-                        distinct_rejected_combinations += matched_part_ratings_ranges.count_distinct_combinations()
+                if action is True:
+                    distinct_accepted_combinations += matched_distinct_combinations
+                elif action is False:
+                    distinct_rejected_combinations += matched_distinct_combinations
                 else:
-                    unresolved_combinations.append((matched_part_ratings_ranges, workflows[rule.action]))
+                    assert isinstance(action, Workflow)
+                    unresolved_combinations.append((matched_part_ratings_ranges, matched_distinct_combinations, action))
         if unmatched_part_ratings_ranges is not None:
             raise ValueError(f'{unmatched_part_ratings_ranges!r} matched no rules '
-                             f'when processing {part_ratings_ranges!r} with workflow {workflow!r}')
+                             f'when processing {part_ratings_ranges!r} with workflow {workflow.name!r}')
     assert distinct_accepted_combinations + distinct_rejected_combinations == total_distinct_combinations
     return distinct_accepted_combinations
 
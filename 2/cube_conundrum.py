@@ -15,7 +15,7 @@ from typing import NamedTuple
 
 COLOUR_COUNTS_DELIMITER = ', '
 COLOUR_COUNT_DELIMITER = ' '
-COLOURS = {'red', 'green', 'blue'}
+COLOUR_INDICES = {colour: index for (index, colour) in enumerate(('red', 'green', 'blue'))}
 
 
 class CubeCollection(NamedTuple):
@@ -49,18 +49,22 @@ class CubeCollection(NamedTuple):
             ...
         ValueError: count for colour 'red' was specified multiple times (1 and 4)
         """
-        counts: dict[str, int] = {}
+        counts = [0, 0, 0]
+        # We track which colours we've seen as bits of an int, so unspecified counts can simply default to zero.
+        seen_colours = 0
         for colour_count in colour_counts.split(COLOUR_COUNTS_DELIMITER):
             (count, colour) = colour_count.split(COLOUR_COUNT_DELIMITER)
             if not count.isdigit():
                 raise ValueError(f'{count!r} is not a valid count for the colour {colour!r}')
-            if colour not in COLOURS:
+            index = COLOUR_INDICES.get(colour)
+            if index is None:
                 raise ValueError(f'{colour!r} is not a valid colour')
-            if colour in counts:
+            if seen_colours & (1 << index):
                 raise ValueError(f'count for colour {colour!r} was specified multiple times '
-                                 f'({counts[colour]} and {int(count)})')
-            counts[colour] = int(count)
-        return CubeCollection(**{colour: counts.get(colour, 0) for colour in COLOURS})
+                                 f'({counts[index]} and {int(count)})')
+            seen_colours |= 1 << index
+            counts[index] = int(count)
+        return CubeCollection._make(counts)
 
 
 GAME_HEADER_DELIMITER = ': '
@@ -70,14 +74,16 @@ COLOUR_COUNTS_SET_DELIMITER = '; '
 
 class Game(NamedTuple):
     id_: int
-    witnessed_cube_collections: tuple[CubeCollection, ...]
-    minimal_cube_collection: CubeCollection
+    # The fewest cubes of each colour that the game could have been played with.
+    minimal_red: int
+    minimal_green: int
+    minimal_blue: int
 
     @classmethod
     def from_line(cls, line: str) -> 'Game':
         """
         >>> Game.from_line('Game 1: 1 red, 2 green; 3 blue, 3 red; 3 green')
-        Game(id_=1, witnessed_cube_collections=(CubeCollection(red=1, green=2, blue=0), CubeCollection(red=3, green=0, blue=3), CubeCollection(red=0, green=3, blue=0)), minimal_cube_collection=CubeCollection(red=3, green=3, blue=3))
+        Game(id_=1, minimal_red=3, minimal_green=3, minimal_blue=3)
         >>> Game.from_line('Juego 1: 1 red, 2 green')
         Traceback (most recent call last):
             ...
@@ -97,17 +103,16 @@ class Game(NamedTuple):
             raise ValueError(f'{header!r} is not a valid game ID')
         id_ = int(header)
 
-        witnessed_cube_collections = []
+        # Callers only ever care about the fewest cubes of each colour, so we fold each witnessed collection into
+        # running maxima as we go, rather than holding onto them.
         (minimal_red, minimal_green, minimal_blue) = (0, 0, 0)
         for colour_counts in body.split(COLOUR_COUNTS_SET_DELIMITER):
-            witnessed_cube_collection = CubeCollection.from_colour_counts(colour_counts)
-            witnessed_cube_collections.append(witnessed_cube_collection)
-            minimal_red = max(witnessed_cube_collection.red, minimal_red)
-            minimal_green = max(witnessed_cube_collection.green, minimal_green)
-            minimal_blue = max(witnessed_cube_collection.blue, minimal_blue)
-        minimal_cube_collection = CubeCollection(minimal_red, minimal_green, minimal_blue)
+            (red, green, blue) = CubeCollection.from_colour_counts(colour_counts)
+            minimal_red = max(red, minimal_red)
+            minimal_green = max(green, minimal_green)
+            minimal_blue = max(blue, minimal_blue)
 
-        return Game(id_, tuple(witnessed_cube_collections), minimal_cube_collection)
+        return Game(id_, minimal_red, minimal_green, minimal_blue)
 
     @classmethod
     def from_lines(cls, lines: Iterable[str]) -> Iterator['Game']:
@@ -119,7 +124,7 @@ class Game(NamedTuple):
         ... ]))
         Traceback (most recent call last):
             ...
-        ValueError: game ID 1 was specified multiple times (Game(id_=1, witnessed_cube_collections=(CubeCollection(red=1, green=0, blue=0),), minimal_cube_collection=CubeCollection(red=1, green=0, blue=0)) and Game(id_=1, witnessed_cube_collections=(CubeCollection(red=0, green=0, blue=1),), minimal_cube_collection=CubeCollection(red=0, green=0, blue=1)))
+        ValueError: game ID 1 was specified multiple times (Game(id_=1, minimal_red=1, minimal_green=0, minimal_blue=0) and Game(id_=1, minimal_red=0, minimal_green=0, minimal_blue=1))
         """
         witnessed_game_ids: dict[int, Game] = {}
         for line in lines:
@@ -144,8 +149,7 @@ def is_relevant_game(game: Game) -> bool:
     >>> is_relevant_game(Game.from_line('Game 5: 6 red, 1 blue, 3 green; 2 blue, 1 red, 2 green'))
     True
     """
-    (red, green, blue) = game.minimal_cube_collection
-    return (red <= 12) and (green <= 13) and (blue <= 14)
+    return (game.minimal_red <= 12) and (game.minimal_green <= 13) and (game.minimal_blue <= 14)
 
 
 def sum_relevant_game_ids(lines: Iterable[str]) -> int:
@@ -159,8 +163,7 @@ def sum_relevant_game_ids(lines: Iterable[str]) -> int:
     ... ])
     8
     """
-    relevant_games = filter(is_relevant_game, Game.from_lines(lines))
-    return sum(map(lambda game: game.id_, relevant_games))
+    return sum(game.id_ for game in Game.from_lines(lines) if is_relevant_game(game))
 
 
 ########################################################################################################################
@@ -180,8 +183,7 @@ def calculate_game_power(game: Game) -> int:
     >>> calculate_game_power(Game.from_line('Game 5: 6 red, 1 blue, 3 green; 2 blue, 1 red, 2 green'))
     36
     """
-    (red, green, blue) = game.minimal_cube_collection
-    return red * green * blue
+    return game.minimal_red * game.minimal_green * game.minimal_blue
 
 
 def sum_game_powers(lines: Iterable[str]) -> int:
@@ -5,9 +5,10 @@
 # Imports
 ########################################################################################################################
 
-from collections import Counter
+from collections import Counter, deque
 from collections.abc import Iterable
 from itertools import chain, count
+from math import lcm
 import re
 from typing import Callable, Optional, Union
 
@@ -17,12 +18,15 @@ from typing import Callable, Optional, Union
 ########################################################################################################################
 
 FlipFlopModuleState = bool
-ConjunctionModuleState = tuple[tuple[str, Optional[bool]], ...]  # I can't be bothered whipping up a hashable frozen dict.
+ConjunctionModuleState = int  # The most recent pulse from each upstream/input module, as one bit per module.
 BroadcastModuleState = type(None)
 ModuleState = Union[FlipFlopModuleState, ConjunctionModuleState, BroadcastModuleState]
 
-ProcessPulseCallable = Callable[[ModuleState, bool, str], tuple[ModuleState, Optional[bool]]]
-ModulesConfig = dict[str, tuple[ProcessPulseCallable, tuple[str, ...]]]
+ProcessPulseCallable = Callable[[ModuleState, bool, int], tuple[ModuleState, Optional[bool]]]
+# How a module processes pulses, how many modules are downstream of it (including untyped modules), and the IDs of the
+# (typed) modules downstream of it. Both configs and states are indexed by module ID.
+ModuleConfig = tuple[ProcessPulseCallable, int, tuple[int, ...]]
+ModulesConfig = tuple[ModuleConfig, ...]
 ModulesState = tuple[ModuleState, ...]
 
 FLIP_FLOP_MODULE_NAME_PREFIX = '%'
@@ -31,12 +35,17 @@ BROADCAST_MODULE_NAME_PREFIX = None
 
 BUTTON_MODULE_NAME = 'button'
 BROADCASTER_MODULE_NAME = 'broadcaster'
+# The button isn't a typed module, so it gets a sentinel ID; the broadcaster always comes first.
+BUTTON_MODULE_ID = -1
+BROADCASTER_MODULE_ID = 0
 
 MODULE_CONFIG_LINE_PATTERN = re.compile(r'^([%&])?([a-z]+) *-> *([ ,a-z]+)$')
+# We look up the pattern's bound fullmatch method once, rather than on every line.
+FULLMATCH_MODULE_CONFIG_LINE = MODULE_CONFIG_LINE_PATTERN.fullmatch
 DOWNSTREAM_MODULE_NAME_DELIMITER = ','
 
 
-def process_pulse_to_flip_flop_module(state: ModuleState, pulse: bool, upstream_module_name: str) -> tuple[ModuleState, Optional[bool]]:
+def process_pulse_to_flip_flop_module(state: ModuleState, pulse: bool, upstream_module_id: int) -> tuple[ModuleState, Optional[bool]]:
     assert isinstance(state, FlipFlopModuleState)
     if pulse:
         # Ignore high pulses.
@@ -47,47 +56,43 @@ def process_pulse_to_flip_flop_module(state: ModuleState, pulse: bool, upstream_
     return (state, state)
 
 
-def process_pulse_to_conjunction_module(state: ModuleState, pulse: bool, upstream_module_name: str) -> tuple[ModuleState, Optional[bool]]:
-    assert isinstance(state, tuple) and all((isinstance(a, str) and (isinstance(b, bool) or b is None)) for (a, b) in state)
-    temp_state = dict(state)
-    assert upstream_module_name in temp_state
-    temp_state[upstream_module_name] = pulse
-    new_state = tuple(sorted(temp_state.items()))
-    if all(sub_state for (_, sub_state) in new_state):
-        # Memory of most recent pulse from all upstream/input modules is high; send a low pulse.
-        return (new_state, False)
-    # Otherwise, send a high pulse.
-    return (new_state, True)
+def make_process_pulse_to_conjunction_module(upstream_module_ids: Iterable[int]) -> ProcessPulseCallable:
+    # We assign each upstream/input module a bit, so that remembering a pulse is a single bitwise operation, and
+    # checking whether we remember high pulses from all of them is a single comparison.
+    upstream_module_bits = {upstream_module_id: 1 << i for (i, upstream_module_id) in enumerate(sorted(upstream_module_ids))}
+    all_high_pulses = (1 << len(upstream_module_bits)) - 1
 
+    def process_pulse_to_conjunction_module(state: ModuleState, pulse: bool, upstream_module_id: int) -> tuple[ModuleState, Optional[bool]]:
+        assert isinstance(state, ConjunctionModuleState) and upstream_module_id in upstream_module_bits
+        upstream_module_bit = upstream_module_bits[upstream_module_id]
+        state = (state | upstream_module_bit) if pulse else (state & ~upstream_module_bit)
+        # If memory of most recent pulse from all upstream/input modules is high, send a low pulse. Otherwise, send a
+        # high pulse.
+        return (state, state != all_high_pulses)
 
-def process_pulse_to_broadcast_module(state: ModuleState, pulse: bool, upstream_module_name: str) -> tuple[ModuleState, Optional[bool]]:
+    return process_pulse_to_conjunction_module
+
+
+def process_pulse_to_broadcast_module(state: ModuleState, pulse: bool, upstream_module_id: int) -> tuple[ModuleState, Optional[bool]]:
     assert state is None
     # Pass through the pulse as-is.
     return (None, pulse)
 
 
-def parse_modules_config(lines: Iterable[str]) -> tuple[ModulesConfig, ModulesState]:
-    config: ModulesConfig = {}
-    initial_state: list[ModuleState] = []
+def parse_modules_config(lines: Iterable[str]) -> tuple[dict[str, int], ModulesConfig, ModulesState]:
+    raw_config: dict[str, tuple[Optional[str], tuple[str, ...]]] = {}
     upstream_modules: dict[str, set[str]] = {}
     for (i, line) in enumerate(lines):
-        match = MODULE_CONFIG_LINE_PATTERN.fullmatch(line)
+        match = FULLMATCH_MODULE_CONFIG_LINE(line)
         if not match:
             raise ValueError(f'Invalid module config on line {i + 1}: {line!r}')
-        (prefix, module_name, raw_downstream_module_names) = match.groups()
-        if prefix == FLIP_FLOP_MODULE_NAME_PREFIX:
-            process_pulse = process_pulse_to_flip_flop_module
-            initial_state.append(False)  # Flip-flop modules are initially off by default.
-        elif prefix == CONJUNCTION_MODULE_NAME_PREFIX:
-            process_pulse = process_pulse_to_conjunction_module
-            initial_state.append(())  # We'll properly initialise these later.
-        elif prefix == BROADCAST_MODULE_NAME_PREFIX:
-            process_pulse = process_pulse_to_broadcast_module
-            initial_state.append(None)  # Broadcast modules don't store state.
-        else:
+        prefix = match[1]
+        module_name = match[2]
+        raw_downstream_module_names = match[3]
+        if prefix not in {FLIP_FLOP_MODULE_NAME_PREFIX, CONJUNCTION_MODULE_NAME_PREFIX, BROADCAST_MODULE_NAME_PREFIX}:
             raise ValueError(f'Invalid module config on line {i + 1} (unexpected prefix): {line!r}')
-        if module_name in config:
-            raise ValueError(f'Redefinition of module config {config[module_name]!r} on line {i + 1}: {line!r}')
+        if module_name in raw_config:
+            raise ValueError(f'Redefinition of module config {raw_config[module_name]!r} on line {i + 1}: {line!r}')
         if module_name == BUTTON_MODULE_NAME:
             raise ValueError(f'Module config on line {i + 1} uses reserved name {BUTTON_MODULE_NAME!r}: {line!r}')
         downstream_module_names = tuple(
@@ -103,48 +108,73 @@ def parse_modules_config(lines: Iterable[str]) -> tuple[ModulesConfig, ModulesSt
         }
         if duplicate_downstream_module_names:
             raise ValueError(f'Downstream modules {duplicate_downstream_module_names!r} repeated on line {i + 1}: {line!r}')
-        config[module_name] = (process_pulse, downstream_module_names)
+        raw_config[module_name] = (prefix, downstream_module_names)
         for downstream_module_name in downstream_module_names:
             if downstream_module_name not in upstream_modules:
                 upstream_modules[downstream_module_name] = set()
             upstream_modules[downstream_module_name].add(module_name)
 
-    if BROADCASTER_MODULE_NAME not in config:
+    if BROADCASTER_MODULE_NAME not in raw_config:
         raise ValueError(f'Missing module config for name {BROADCASTER_MODULE_NAME!r}')
 
-    for (i, (module_name, state)) in enumerate(zip(config.keys(), initial_state)):
-        if state == ():
-            # Conjunction modules initially remember the most recent pulse as low for all upstream/input modules.
-            # However, we'll draw a distinction between the default most recent pulse and a real most recent pulse of
-            # low.
-            initial_state[i] = tuple((upstream_module_name, None) for upstream_module_name in sorted(upstream_modules[module_name]))
+    # Now that we've seen every module, we can number them, so that propagating pulses only ever needs to index into
+    # tuples (rather than look up names); and specialise how each module processes pulses.
+    module_ids = {BROADCASTER_MODULE_NAME: BROADCASTER_MODULE_ID}
+    for module_name in raw_config:
+        if module_name != BROADCASTER_MODULE_NAME:
+            module_ids[module_name] = len(module_ids)
+    config: list[ModuleConfig] = []
+    initial_state: list[ModuleState] = []
+    for module_name in module_ids:
+        (prefix, downstream_module_names) = raw_config[module_name]
+        process_pulse: ProcessPulseCallable
+        if prefix == FLIP_FLOP_MODULE_NAME_PREFIX:
+            process_pulse = process_pulse_to_flip_flop_module
+            initial_state.append(False)  # Flip-flop modules are initially off by default.
+        elif prefix == CONJUNCTION_MODULE_NAME_PREFIX:
+            process_pulse = make_process_pulse_to_conjunction_module(
+                module_ids[upstream_module_name] for upstream_module_name in upstream_modules[module_name]
+            )
+            initial_state.append(0)  # Conjunction modules initially remember a low pulse for all upstream/input modules.
+        else:
+            process_pulse = process_pulse_to_broadcast_module
+            initial_state.append(None)  # Broadcast modules don't store state.
+        # Untyped modules never do anything with the pulses they receive, so we only count pulses sent to them.
+        downstream_module_ids = tuple(
+            module_ids[downstream_module_name]
+            for downstream_module_name
+            in downstream_module_names
+            if downstream_module_name in module_ids
+        )
+        config.append((process_pulse, len(downstream_module_names), downstream_module_ids))
 
-    return (config, tuple(initial_state))
+    return (module_ids, tuple(config), tuple(initial_state))
 
 
-def propagate(config: ModulesConfig, state: ModulesState) -> tuple[ModulesState, tuple[int, int]]:
-    next_state: dict[str, ModuleState] = {module_name: module_state for (module_name, module_state) in zip(config.keys(), state)}
+def propagate(config: ModulesConfig, state: ModulesState, watched_module_ids: frozenset[int] = frozenset()) -> tuple[ModulesState, tuple[int, int], set[int]]:
+    next_state = list(state)
     num_low_pulses = 1  # The button module sends a low pulse to the broadcast module named "broadcaster".
     num_high_pulses = 0
-    pulses_to_process = [('button', False, 'broadcaster')]
+    # Which of the watched modules sent high pulses at any point while propagating.
+    high_pulse_module_ids: set[int] = set()
+    pulses_to_process = deque([(BUTTON_MODULE_ID, False, BROADCASTER_MODULE_ID)])
 
     while pulses_to_process:
-        (upstream_module_name, received_pulse, module_name) = pulses_to_process.pop(0)
-        (process_pulse, downstream_module_names) = config[module_name]
-        module_state = next_state[module_name]
-        (next_module_state, transmitted_pulse) = process_pulse(module_state, received_pulse, upstream_module_name)
-        next_state[module_name] = next_module_state  # Updating existing keys won't affect preserved insertion order.
+        (upstream_module_id, received_pulse, module_id) = pulses_to_process.popleft()
+        (process_pulse, num_downstream_modules, downstream_module_ids) = config[module_id]
+        (next_state[module_id], transmitted_pulse) = process_pulse(next_state[module_id], received_pulse, upstream_module_id)
         if transmitted_pulse is None:
             continue
         if transmitted_pulse:
-            num_high_pulses += len(downstream_module_names)
+            num_high_pulses += num_downstream_modules
+            if module_id in watched_module_ids:
+                high_pulse_module_ids.add(module_id)
         else:
-            num_low_pulses += len(downstream_module_names)
-        for downstream_module_name in downstream_module_names:
-            if downstream_module_name in config:
-                pulses_to_process.append((module_name, transmitted_pulse, downstream_module_name))
+            num_low_pulses += num_downstream_modules
+        for downstream_module_id in downstream_module_ids:
+            pulses_to_process.append((module_id, transmitted_pulse, downstream_module_id))
 
-    return (tuple(next_state.values()), (num_low_pulses, num_high_pulses))
+    return (tuple(next_state), (num_low_pulses, num_high_pulses), high_pulse_module_ids)
 
 
 def count_pulse_types(config: ModulesConfig, state: ModulesState, num_button_presses: int) -> tuple[int, int]:
@@ -155,7 +185,7 @@ def count_pulse_types(config: ModulesConfig, state: ModulesState, num_button_pre
     for i in range(num_button_presses):
         if state in witnessed_states:
             break
-        (next_state, (num_low_pulses, num_high_pulses)) = propagate(config, state)
+        (next_state, (num_low_pulses, num_high_pulses), _) = propagate(config, state)
         witnessed_states[state] = (i, num_low_pulses, num_high_pulses)
         witnessed_state_sequence.append(state)
         total_low_pulses += num_low_pulses
@@ -196,7 +226,7 @@ def calculate_product_of_pulse_types_after_thousand_button_presses(lines: Iterab
     ... ])
     11687500
     """
-    (config, initial_state) = parse_modules_config(lines)
+    (_, config, initial_state) = parse_modules_config(lines)
     (num_low_pulses, num_high_pulses) = count_pulse_types(config, initial_state, 1000)
     return num_low_pulses * num_high_pulses
 
@@ -206,16 +236,79 @@ def calculate_product_of_pulse_types_after_thousand_button_presses(lines: Iterab
 ########################################################################################################################
 
 def count_button_presses_until_rx_is_triggered(lines: Iterable[str]) -> int:
-    (config, initial_state) = parse_modules_config(chain.from_iterable((
+    """
+    When "rx" has a sole upstream conjunction module, we take the lowest common multiple of its inputs' cycles. Here,
+    "x" sends a high pulse every 2nd button press and "y" every 4th:
+
+    >>> count_button_presses_until_rx_is_triggered([
+    ...     'broadcaster -> a',
+    ...     '%a -> b, x',
+    ...     '%b -> y',
+    ...     '&x -> gate',
+    ...     '&y -> gate',
+    ...     '&gate -> rx',
+    ... ])
+    4
+
+    Otherwise, we press the button until "rx" receives a low pulse:
+
+    >>> count_button_presses_until_rx_is_triggered([
+    ...     'broadcaster -> a',
+    ...     '%a -> rx',
+    ... ])
+    2
+    >>> count_button_presses_until_rx_is_triggered([
+    ...     'broadcaster -> a, b',
+    ...     '%a -> rx',
+    ...     '%b -> c',
+    ...     '%c -> rx',
+    ... ])
+    2
+    """
+    (module_ids, config, initial_state) = parse_modules_config(chain.from_iterable((
         lines,
         ('&rx -> dummy',),
     )))
-    state = initial_state
+    rx_module_id = module_ids['rx']
+    rx_upstream_module_ids = [
+        module_id
+        for (module_id, (_, _, downstream_module_ids))
+        in enumerate(config)
+        if rx_module_id in downstream_module_ids
+    ]
+
+    # Only conjunction modules have (non-Boolean) integer states.
+    if (len(rx_upstream_module_ids) == 1) and (type(initial_state[rx_upstream_module_ids[0]]) is ConjunctionModuleState):
+        # "rx" receives a low pulse when its sole upstream/input conjunction module remembers high pulses from all of
+        # its own upstream/input modules. In practice, each of those sends a high pulse on its own fixed cycle of button
+        # presses, so rather than pressing the button until the cycles line up, we find the first button press on which
+        # each sends a high pulse, and take the lowest common multiple of those.
+        gate_module_id = rx_upstream_module_ids[0]
+        cycle_module_ids = frozenset(
+            module_id
+            for (module_id, (_, _, downstream_module_ids))
+            in enumerate(config)
+            if gate_module_id in downstream_module_ids
+        )
+        cycle_lengths: dict[int, int] = {}
+        state = initial_state
+        for i in count(1):
+            (state, _, high_pulse_module_ids) = propagate(config, state, cycle_module_ids)
+            for module_id in high_pulse_module_ids:
+                cycle_lengths.setdefault(module_id, i)
+            if len(cycle_lengths) == len(cycle_module_ids):
+                return lcm(*cycle_lengths.values())
+
+    # Otherwise, we just keep pressing the button. We want to know when "rx" actually receives a low pulse, as opposed
+    # to when it merely starts out remembering low pulses; so we have it start out remembering high pulses from all its
+    # upstream/input modules instead.
+    rx_all_high_pulses = (1 << len(rx_upstream_module_ids)) - 1
+    state = initial_state[:rx_module_id] + (rx_all_high_pulses,) + initial_state[rx_module_id + 1:]
     for i in count(1):
-        (state, _) = propagate(config, state)
-        rx_state = state[-1]
-        assert isinstance(rx_state, tuple) and all((isinstance(a, str) and (isinstance(b, bool) or b is None)) for (a, b) in rx_state)
-        if any(s is False for (_, s) in rx_state):
+        (state, _, _) = propagate(config, state)
+        rx_state = state[rx_module_id]
+        assert isinstance(rx_state, ConjunctionModuleState)
+        if rx_state != rx_all_high_pulses:
             break
     return i
 
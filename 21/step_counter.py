@@ -22,32 +22,6 @@ class Coordinate(NamedTuple):
         return f'({self.x}, {self.y})'
 
 
-class CardinalDirection(Enum):
-    NORTH = 'N'
-    EAST = 'E'
-    SOUTH = 'S'
-    WEST = 'W'
-
-
-def translate(coord: Coordinate, direction: CardinalDirection) -> Coordinate:
-    (x, y) = coord
-    if direction == CardinalDirection.NORTH:
-        return Coordinate(x, y - 1)
-    elif direction == CardinalDirection.SOUTH:
-        return Coordinate(x, y + 1)
-    elif direction == CardinalDirection.EAST:
-        return Coordinate(x + 1, y)
-    elif direction == CardinalDirection.WEST:
-        return Coordinate(x - 1, y)
-    else:
-        raise ValueError(f'Unexpected direction: {direction!r}')
-
-
-def wrap(width: int, height: int, coord: Coordinate) -> Coordinate:
-    (x, y) = coord
-    return Coordinate(x % width, y % height)
-
-
 class Tile(Enum):
     STARTING_POSITION = 'S'
     GARDEN_PLOT = '.'
@@ -85,6 +59,24 @@ class Map(NamedTuple):
             raise ValueError(f'Parsed {width} × {y + 1} map, but no starting position was specified')
         return Map(width, y + 1, starting_position, tuple(rows))
 
+    def has_clear_lanes(self) -> bool:
+        """
+        Check whether the starting position's row and column, and the map's edges, are all garden plots.
+
+        >>> Map.from_lines(['.....', '.#.#.', '..S..', '.#.#.', '.....']).has_clear_lanes()
+        True
+        >>> Map.from_lines(['.....', '.#.#.', '..S#.', '.#.#.', '.....']).has_clear_lanes()
+        False
+        >>> Map.from_lines(['.....', '.#.#.', '..S..', '.#.#.', '...#.']).has_clear_lanes()
+        False
+        """
+        (starting_x, starting_y) = self.starting_position
+        lanes = (
+            self.tiles[0], self.tiles[-1], self.tiles[starting_y],
+            (row[0] for row in self.tiles), (row[-1] for row in self.tiles), (row[starting_x] for row in self.tiles),
+        )
+        return all(tile == Tile.GARDEN_PLOT for lane in lanes for tile in lane)
+
     def count_reachable_garden_plots(self, total_steps: int, wraparound: bool) -> int:
         """
         >>> map_ = Map.from_lines([
@@ -116,36 +108,64 @@ class Map(NamedTuple):
         >>> # 668697
         >>> # map_.count_reachable_garden_plots(5000, True)
         >>> # 16733044
+
+        On a square map with the starting position at its centre and clear lanes, we extrapolate rather than search. The
+        extrapolation agrees with a full search over the same infinite garden, which we can force by tiling the map 3 × 3
+        ourselves, so that the step counts no longer line up with its width.
+
+        >>> lines = ['.......', '.##.#..', '.#...#.', '...S...', '.#..##.', '..#.#..', '.......']
+        >>> plain_lines = [line.replace('S', '.') for line in lines]
+        >>> tiled_map = Map.from_lines(
+        ...     [plain_line * 3 for plain_line in plain_lines] +
+        ...     [plain_line + line + plain_line for (plain_line, line) in zip(plain_lines, lines)] +
+        ...     [plain_line * 3 for plain_line in plain_lines]
+        ... )
+        >>> map_ = Map.from_lines(lines)
+        >>> (map_.count_reachable_garden_plots(24, True), tiled_map.count_reachable_garden_plots(24, True))
+        (476, 476)
+        >>> (map_.count_reachable_garden_plots(38, True), tiled_map.count_reachable_garden_plots(38, True))
+        (1178, 1178)
         """
         assert total_steps >= 1
-        visited_garden_plots: set[Coordinate] = set()
-        frontier: list[tuple[int, Coordinate, Coordinate]] = [(total_steps, self.starting_position, self.starting_position)]
-        last_steps_remaining = total_steps
-        reachable_garden_plots = 0
-        while frontier:
-            (steps_remaining, wrapped_position, position) = frontier.pop(0)
-            if steps_remaining != last_steps_remaining:
-                last_steps_remaining = steps_remaining
-                # By definition, when we take a next step, we can't be where we were in the previous step.
-                reachable_garden_plots = len(visited_garden_plots) - reachable_garden_plots
-            assert steps_remaining >= 0
-            assert self.tiles[wrapped_position.y][wrapped_position.x] == Tile.GARDEN_PLOT
-            if position in visited_garden_plots:
-                continue
-            visited_garden_plots.add(position)
-            if steps_remaining == 0:
-                continue
-            next_steps_remaining = steps_remaining - 1
-            for next_position in (translate(position, direction) for direction in CardinalDirection):
-                next_wrapped_position = wrap(self.width, self.height, next_position)
-                if not wraparound and (next_wrapped_position != next_position):
-                    continue
-                if self.tiles[next_wrapped_position.y][next_wrapped_position.x] != Tile.GARDEN_PLOT:
-                    continue
-                if next_position in visited_garden_plots:
-                    continue
-                frontier.append((next_steps_remaining, next_wrapped_position, next_position))
-        return len(visited_garden_plots) - reachable_garden_plots
+        (width, height, (starting_x, starting_y)) = (self.width, self.height, self.starting_position)
+        if wraparound and (width == height) and (starting_x == starting_y == width // 2) and \
+           (total_steps % width == starting_x) and (total_steps // width >= 3) and self.has_clear_lanes():
+            # When the starting position sits at the centre of a square map, with clear lanes running along its row,
+            # its column, and the map's edges, each further `width` steps reaches one more ring of whole copies of the
+            # map, in the same pattern as the ring before. The number of reachable garden plots after `starting_x +
+            # (k * width)` steps is then quadratic in `k`, so we can sample it at `k = 0, 1, 2` and extrapolate using
+            # Newton's forward differences.
+            (y_0, y_1, y_2) = (self.count_reachable_garden_plots(starting_x + (k * width), True) for k in range(3))
+            k = total_steps // width
+            return y_0 + (k * (y_1 - y_0)) + ((k * (k - 1) // 2) * (y_2 - (2 * y_1) + y_0))
+        # With wraparound, we can only ever reach so far from the starting position, so we tile enough copies of the map
+        # around the original to cover that.
+        (copies_across, copies_down) = \
+            (2 * -(-total_steps // width) + 1, 2 * -(-total_steps // height) + 1) if wraparound else (1, 1)
+        # We represent (the tiled copies of) the map as a bitboard of garden plots. Like day 14, it packs the rows from
+        # top to bottom, and each row from left to right, from the most significant bit down; but we also pad each row
+        # with a leading zero bit, so that stepping east or west off the edge of a row lands on rocks instead of
+        # wrapping around to the adjacent row.
+        stride = (width * copies_across) + 1
+        rows_bits = tuple(''.join('1' if tile == Tile.GARDEN_PLOT else '0' for tile in row) for row in self.tiles)
+        garden_plots = int(''.join(('0' + (row_bits * copies_across)) for _ in range(copies_down) for row_bits in rows_bits), 2)
+        (board_x, board_y) = (starting_x + (width * (copies_across // 2)), starting_y + (height * (copies_down // 2)))
+        num_bits = stride * height * copies_down
+        # A garden plot is reachable in exactly `n + 1` steps iff it neighbours one reachable in exactly `n` steps, so
+        # we can take each step for every garden plot at once with a handful of shifts. Stepping back and forth means
+        # the garden plots reachable in `n + 2` steps include those reachable in `n` steps, so we can stop early once
+        # that stops growing.
+        reachable_garden_plots_by_parity = [1 << (num_bits - 1 - ((board_y * stride) + 1 + board_x)), 0]
+        for steps in range(1, total_steps + 1):
+            reachable_garden_plots = reachable_garden_plots_by_parity[(steps - 1) % 2]
+            next_reachable_garden_plots = garden_plots & (
+                (reachable_garden_plots << 1) | (reachable_garden_plots >> 1) |
+                (reachable_garden_plots << stride) | (reachable_garden_plots >> stride)
+            )
+            if next_reachable_garden_plots == reachable_garden_plots_by_parity[steps % 2]:
+                break
+            reachable_garden_plots_by_parity[steps % 2] = next_reachable_garden_plots
+        return bin(reachable_garden_plots_by_parity[total_steps % 2]).count('1')
 
 
 ########################################################################################################################
@@ -87,7 +87,7 @@ def sum_extrapolated_prev_values(lines: Iterable[str]) -> int:
     2
     """
     histories = parse_oasis_report(lines)
-    reversed_histories = tuple(tuple(reversed(history)) for history in histories)
+    reversed_histories = tuple(history[::-1] for history in histories)
     return sum(extrapolate_next_values(reversed_history, 1)[0] for reversed_history in reversed_histories)
 
 